@@ -1,57 +1,105 @@
 from flask import Flask
 from flask_sqlalchemy import SQLAlchemy
-from flask_migrate import Migrate
 from flask_jwt_extended import JWTManager
-from flask_cors import CORS
-from elasticsearch import Elasticsearch
 from config import Config
-from sqlalchemy import event
+from app.utils.startup import StartupTimer
 
 
 db = SQLAlchemy()
-migrate = Migrate()
 jwt = JWTManager()
 
 
-def create_app(config_class=Config):
+def create_app(config_class=Config, api=True):
+    """Application factory.
+
+    With api=False only the database, models and shared helpers are set up: no JWT, CORS,
+    migrations, blueprints or error handlers (see create_engine_app). Optional subsystems
+    are imported here rather than at module level, and the Elasticsearch client is only
+    created on first use. With STARTUP_PROFILE set, the time spent in each step is logged.
+    """
+    timer = StartupTimer()
     app = Flask(__name__)
     app.config.from_object(config_class)
 
-    # Initialize extensions
+    # Initialize extensions, with pool, statement cache and SQLite pragmas from DB_PROFILE
+    from app.utils.database import configure_database, set_pragmas
+    pragmas = configure_database(app)
     db.init_app(app)
-    migrate.init_app(app, db)
+    with app.app_context():
+        set_pragmas(db.engine, pragmas)
+    timer.mark('database')
+
+    if api:
+        register_api(app)
+        timer.mark('api')
+
+    configure_helpers(app)
+    timer.mark('helpers')
+
+    # Elasticsearch client, connected on first use
+    from app.search import make_backend, search_indexer, ElasticsearchBackend, LazyElasticsearch
+    app.elastic_search = LazyElasticsearch(app.config['ELASTICSEARCH_URL']) \
+        if app.config['ELASTICSEARCH_URL'] else None
+
+    # Search backend; with Elasticsearch, index changes are sent in the background so
+    # commits don't wait on the search cluster
+    app.search_backend = make_backend(app)
+    search_indexer.configure(app.elastic_search if isinstance(app.search_backend, ElasticsearchBackend) else None,
+                             app.config['SEARCH_INDEX_BATCH_SIZE'], app.config['SEARCH_INDEX_MAX_RETRIES'])
+    timer.mark('search')
+
+    app.startup_timings = timer.timings
+    if app.config['STARTUP_PROFILE']:
+        app.logger.warning(timer.report())
+    return app
+
+
+def create_engine_app(config_class=Config):
+    """Database-only app for the live engine and scripts, which don't serve the API"""
+    return create_app(config_class, api=False)
+
+
+def register_api(app):
+    from flask_cors import CORS
+    from flask_migrate import Migrate
+
+    Migrate(app, db)
     jwt.init_app(app)
     CORS(app)
     app.url_map.strict_slashes = False
 
-    if 'sqlite' in app.config['SQLALCHEMY_DATABASE_URI']:
-
-        with app.app_context():
-            @event.listens_for(db.engine, "connect")
-            def enable_wal(dbapi_connection, connection_record):
-                cursor = dbapi_connection.cursor()
-                cursor.execute("PRAGMA journal_mode=WAL;")
-                cursor.close()
-
     # Register blueprints
     from app.routes.auth import auth_bp
     from app.routes.users import users_bp
     from app.routes.trades import trades_bp
     from app.routes.tickers import tickers_bp
     from app.routes.tags import tags_bp
+    from app.routes.analytics import analytics_bp
 
     app.register_blueprint(auth_bp, url_prefix='/api/auth')
     app.register_blueprint(users_bp, url_prefix='/api/users')
     app.register_blueprint(trades_bp, url_prefix='/api/trades')
     app.register_blueprint(tickers_bp, url_prefix='/api/tickers')
     app.register_blueprint(tags_bp, url_prefix='/api/tags')
+    app.register_blueprint(analytics_bp, url_prefix='/api/analytics')
 
     # Error handlers
     from app.utils.error_handlers import register_error_handlers
     register_error_handlers(app)
 
-    # Elasticsearch
-    app.elastic_search = Elasticsearch([app.config['ELASTICSEARCH_URL']]) \
-        if app.config['ELASTICSEARCH_URL'] else None
 
-    return app
\ No newline at end of file
+def configure_helpers(app):
+    # Identity and Google key caches shared by requests in this process
+    from app.utils.auth import user_cache, google_jwks
+    user_cache.configure(app.config['USER_CACHE_SIZE'], app.config['USER_CACHE_TTL'])
+    google_jwks.configure(app.config['GOOGLE_JWKS_URL'])
+
+    from app.models.tag import tag_cache
+    tag_cache.configure(app.config['TAG_CACHE_SIZE'], app.config['TAG_CACHE_TTL'])
+
+    from app.utils.ticker_index import ticker_index
+    ticker_index.configure(app.config['TICKER_INDEX_REFRESH_INTERVAL'])
+
+    from app.utils.passwords import password_hasher
+    password_hasher.configure(app.config['PASSWORD_HASH_METHOD'], app.config['PASSWORD_HASH_WORKERS'],
+                              app.config['PASSWORD_HASH_MAX_PENDING'])
@@ -3,4 +3,5 @@ from .user import User
 from .ticker import Ticker
 from .trade import Trade, trade_tags
 from .tag import Tag
+from .summary import TradeSummary, SummaryDelta
 from .utils import *
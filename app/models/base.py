@@ -1,53 +1,81 @@
 import uuid
+import json
+import base64
 from datetime import datetime, timezone
 import sqlalchemy as sa
 import sqlalchemy.orm as so
 from flask import url_for
 from app import db
-from app.search import query_index, add_to_index, remove_from_index, create_index
+from app.search import query_index, create_index, reindex_all, search_indexer
 
 
 class SearchableMixin(object):
+    # Fields kept in the index's _source without being analyzed, so hits can be returned as-is
+    __search_stored__ = []
+
     @classmethod
-    def search(cls, expression, page, per_page):
-        ids, total = query_index(cls.__tablename__, expression, page, per_page)
-        if total == 0:
-            return [], 0
-        when = []
-        for i in range(len(ids)):
-            when.append((ids[i], i))
-        query = sa.select(cls).where(cls.id.in_(ids)).order_by(
-            db.case(*when, value=cls.id))
-        return db.session.scalars(query).all(), total
+    def search(cls, expression, page, per_page, hydrate=False, filters=None):
+        """(results, total) for one page of search hits, optionally filtered by {column: value}.
+
+        Results are the hits' stored fields ({'id', *__searchable__, *__search_stored__}),
+        or model instances loaded with one query when hydrate is set.
+        """
+        hits, total = query_index(cls.__tablename__, expression, page, per_page, fields=cls.__searchable__,
+                                  filters=filters)
+        if not hydrate or not hits:
+            return hits, total
+        ids = [hit['id'] for hit in hits]
+        objects = {obj.id: obj for obj in db.session.scalars(sa.select(cls).where(cls.id.in_(ids)))}
+        return [objects[hit['id']] for hit in hits if hit['id'] in objects], total
 
     @classmethod
-    def before_commit(cls, session):
-        session._changes = {
-            'add': list(session.new),
-            'update': list(session.dirty),
-            'delete': list(session.deleted)
-        }
+    def search_fields(cls):
+        return cls.__searchable__ + cls.__search_stored__
+
+    def search_document(self):
+        return {field: getattr(self, field) for field in self.search_fields()}
+
+    def search_fields_modified(self):
+        attrs = sa.inspect(self).attrs
+        return any(attrs[field].history.has_changes() for field in self.search_fields())
 
     @classmethod
-    def after_commit(cls, session):
-        for obj in session._changes['add']:
-            if isinstance(obj, SearchableMixin):
-                add_to_index(obj.__tablename__, obj)
-        for obj in session._changes['update']:
+    def track_documents(cls, documents):
+        """Queue {id: document} for rows written with core statements, indexed on commit"""
+        if search_indexer.enabled:
+            db.session.info.setdefault('search_changes', {}).update(
+                ((cls.__tablename__, doc_id), document) for doc_id, document in documents.items())
+
+    @classmethod
+    def after_flush(cls, session, flush_context):
+        # Only searchable objects are captured, keyed by document so repeated flushes of the
+        # same object in one transaction collapse into its final state
+        if not search_indexer.enabled:
+            return
+        changes = session.info.setdefault('search_changes', {})
+        for obj in session.new:
             if isinstance(obj, SearchableMixin):
-                add_to_index(obj.__tablename__, obj)
-        for obj in session._changes['delete']:
+                changes[(obj.__tablename__, obj.id)] = obj.search_document()
+        for obj in session.dirty:
+            # Skips e.g. price updates on tickers, which don't touch any indexed field
+            if isinstance(obj, SearchableMixin) and obj.search_fields_modified():
+                changes[(obj.__tablename__, obj.id)] = obj.search_document()
+        for obj in session.deleted:
             if isinstance(obj, SearchableMixin):
-                remove_from_index(obj.__tablename__, obj)
-        session._changes = None
+                changes[(obj.__tablename__, obj.id)] = None
 
     @classmethod
-    def reindex(cls):
-        # First create/update the index with proper mappings
-        create_index(cls.__tablename__, cls)
-        # Then reindex all objects
-        for obj in db.session.scalars(sa.select(cls)):
-            add_to_index(cls.__tablename__, obj)
+    def after_commit(cls, session):
+        search_indexer.submit(session.info.pop('search_changes', None))
+
+    @classmethod
+    def after_rollback(cls, session):
+        session.info.pop('search_changes', None)
+
+    @classmethod
+    def reindex(cls, **kwargs):
+        # Builds a new index alongside the live one and swaps the alias when done
+        return reindex_all(cls.__tablename__, cls, **kwargs)
 
     @classmethod
     def init_index(cls):
@@ -55,8 +83,21 @@ class SearchableMixin(object):
         create_index(cls.__tablename__, cls)
 
 
-db.event.listen(db.session, 'before_commit', SearchableMixin.before_commit)
+db.event.listen(db.session, 'after_flush', SearchableMixin.after_flush)
 db.event.listen(db.session, 'after_commit', SearchableMixin.after_commit)
+db.event.listen(db.session, 'after_rollback', SearchableMixin.after_rollback)
+
+
+def dialect_insert(table):
+    """INSERT construct for the bound database that supports on_conflict_do_nothing/do_update.
+
+    configure_database only lets SQLite and Postgres through, so no other dialect gets here.
+    """
+    if db.engine.dialect.name == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+    return insert(table)
 
 
 class PaginatedAPIMixin(object):
@@ -83,6 +124,55 @@ class PaginatedAPIMixin(object):
         }
         return data
 
+    @staticmethod
+    def encode_cursor(value, id):
+        """Encode the (sort value, id) of the last row on a page as an opaque cursor"""
+        if isinstance(value, datetime):
+            value = value.isoformat()
+        raw = json.dumps([value, id], separators=(',', ':')).encode()
+        return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+    @staticmethod
+    def decode_cursor(cursor, column):
+        """Decode a cursor produced by encode_cursor, raises ValueError if it is malformed"""
+        try:
+            raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+            value, id = json.loads(raw)
+            if value is not None and isinstance(column.type, sa.DateTime):
+                value = datetime.fromisoformat(value)
+        except Exception:
+            raise ValueError('Invalid cursor')
+        return value, id
+
+    @staticmethod
+    def keyset_paginate(query, column, id_column, cursor, per_page, descending=True):
+        """Page through query ordered by (column, id) using a keyset cursor instead of OFFSET.
+
+        NULL sort values are always placed last. Returns the items of the page and the
+        cursor of the next page (None on the last page).
+        """
+        if cursor:
+            value, last_id = PaginatedAPIMixin.decode_cursor(cursor, column)
+            after_id = id_column < last_id if descending else id_column > last_id
+            if value is None:
+                query = query.filter(column.is_(None), after_id)
+            else:
+                after_value = column < value if descending else column > value
+                query = query.filter(sa.or_(after_value, sa.and_(column == value, after_id), column.is_(None)))
+
+        if descending:
+            query = query.order_by(column.desc().nulls_last(), id_column.desc())
+        else:
+            query = query.order_by(column.asc().nulls_last(), id_column.asc())
+
+        items = query.limit(per_page + 1).all()
+        next_cursor = None
+        if len(items) > per_page:
+            items = items[:per_page]
+            last = items[-1]
+            next_cursor = PaginatedAPIMixin.encode_cursor(getattr(last, column.key), getattr(last, id_column.key))
+        return items, next_cursor
+
 
 class BaseModel(PaginatedAPIMixin, db.Model):
     __abstract__ = True
@@ -91,3 +181,13 @@ class BaseModel(PaginatedAPIMixin, db.Model):
     created_at: so.Mapped[datetime] = so.mapped_column(sa.DateTime(timezone=True),
                                                        default=lambda: datetime.now(timezone.utc), nullable=False)
 
+    @classmethod
+    def iter_all(cls, *criteria, batch_size=1000):
+        """Iterate over all matching rows in (created_at, id) order through a server-side cursor.
+
+        Only one batch of rows is held in memory at a time, for scripts that walk whole tables.
+        """
+        stmt = sa.select(cls).where(*criteria).order_by(cls.created_at, cls.id) \
+            .execution_options(yield_per=batch_size)
+        return db.session.scalars(stmt)
+
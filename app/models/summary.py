@@ -0,0 +1,121 @@
+from collections import defaultdict
+import sqlalchemy as sa
+import sqlalchemy.orm as so
+from app import db
+from app.models.base import dialect_insert
+from app.models.utils import TradeStatus, TradeTimeframe
+
+SUMMARY_COUNTERS = ('total', 'active', 'entry', 'target', 'stoploss', 'rr_sum', 'rr_count')
+STATUS_COUNTERS = {
+    TradeStatus.ACTIVE: 'active',
+    TradeStatus.ENTRY: 'entry',
+    TradeStatus.TARGET: 'target',
+    TradeStatus.STOPLOSS: 'stoploss',
+}
+
+
+class TradeSummary(db.Model):
+    """Per-user trade counters, overall ('all'), per timeframe and per tag.
+
+    Kept up to date incrementally through SummaryDelta in the same transaction as the
+    trade writes, and recomputable from scratch with rebuild().
+    """
+    __tablename__ = 'trade_summary'
+
+    ALL = 'all'
+    TIMEFRAME = 'timeframe'
+    TAG = 'tag'
+
+    user_id: so.Mapped[str] = so.mapped_column(sa.ForeignKey('user.id'), primary_key=True)
+    dimension: so.Mapped[str] = so.mapped_column(sa.String(20), primary_key=True)
+    key: so.Mapped[str] = so.mapped_column(sa.String(36), primary_key=True, default='')
+
+    total: so.Mapped[int] = so.mapped_column(sa.Integer, nullable=False, default=0)
+    active: so.Mapped[int] = so.mapped_column(sa.Integer, nullable=False, default=0)
+    entry: so.Mapped[int] = so.mapped_column(sa.Integer, nullable=False, default=0)
+    target: so.Mapped[int] = so.mapped_column(sa.Integer, nullable=False, default=0)
+    stoploss: so.Mapped[int] = so.mapped_column(sa.Integer, nullable=False, default=0)
+    rr_sum: so.Mapped[float] = so.mapped_column(sa.Float, nullable=False, default=0.0)
+    rr_count: so.Mapped[int] = so.mapped_column(sa.Integer, nullable=False, default=0)
+
+    user: so.Mapped["User"] = so.relationship(back_populates="summaries")
+
+    def __repr__(self):
+        return f"<TradeSummary {self.user_id} {self.dimension}={self.key}>"
+
+    @property
+    def win_rate(self):
+        closed = self.target + self.stoploss
+        return round(self.target / closed, 4) if closed else None
+
+    @property
+    def avg_risk_reward(self):
+        return round(self.rr_sum / self.rr_count, 2) if self.rr_count else None
+
+    @classmethod
+    def rebuild(cls, user_id=None):
+        """Recompute summaries from the trade table with SQL aggregates, without committing"""
+        from app.models.trade import Trade, trade_tags
+
+        rr = Trade.risk_reward_ratio
+        columns = [sa.func.count(Trade.id)]
+        columns += [sa.func.sum(sa.case((Trade.status == status, 1), else_=0)) for status in STATUS_COUNTERS]
+        columns += [sa.func.coalesce(sa.func.sum(rr), 0.0), sa.func.count(rr)]
+        names = ['total'] + list(STATUS_COUNTERS.values()) + ['rr_sum', 'rr_count']
+
+        scope = [Trade.user_id == user_id] if user_id else []
+        queries = [
+            (cls.ALL, sa.select(Trade.user_id, sa.literal(''), *columns).where(*scope).group_by(Trade.user_id)),
+            (cls.TIMEFRAME, sa.select(Trade.user_id, Trade.timeframe, *columns).where(*scope)
+             .group_by(Trade.user_id, Trade.timeframe)),
+            (cls.TAG, sa.select(Trade.user_id, trade_tags.c.tag_id, *columns)
+             .join(trade_tags, trade_tags.c.trade_id == Trade.id).where(*scope)
+             .group_by(Trade.user_id, trade_tags.c.tag_id)),
+        ]
+
+        db.session.execute(sa.delete(cls).where(*([cls.user_id == user_id] if user_id else [])))
+        for dimension, query in queries:
+            rows = [dict(zip(names, values), user_id=uid, dimension=dimension, key=key)
+                    for uid, key, *values in db.session.execute(query)]
+            if rows:
+                db.session.execute(sa.insert(cls), rows)
+
+
+class SummaryDelta:
+    """Accumulates counter changes for a batch of trade writes and applies them in one upsert"""
+
+    def __init__(self):
+        self.rows = defaultdict(lambda: dict.fromkeys(SUMMARY_COUNTERS, 0))
+
+    def add(self, user_id, status, timeframe, risk_reward, tag_ids=(), sign=1):
+        keys = [(user_id, TradeSummary.ALL, ''), (user_id, TradeSummary.TIMEFRAME, timeframe or TradeTimeframe.DAY)]
+        keys += [(user_id, TradeSummary.TAG, tag_id) for tag_id in set(tag_ids)]
+        for key in keys:
+            row = self.rows[key]
+            row['total'] += sign
+            row[STATUS_COUNTERS[status or TradeStatus.ACTIVE]] += sign
+            if risk_reward is not None:
+                row['rr_sum'] += sign * risk_reward
+                row['rr_count'] += sign
+
+    def add_trade(self, trade, sign=1):
+        self.add(trade.user_id, trade.status, trade.timeframe, trade.risk_reward_ratio,
+                 [tag.id for tag in trade.tags], sign)
+
+    def remove_trade(self, trade):
+        self.add_trade(trade, sign=-1)
+
+    def apply(self):
+        """Upsert the accumulated deltas, without committing"""
+        rows = [dict(counters, user_id=user_id, dimension=dimension, key=key)
+                for (user_id, dimension, key), counters in self.rows.items() if any(counters.values())]
+        self.rows.clear()
+        if not rows:
+            return
+
+        table = TradeSummary.__table__
+        stmt = dialect_insert(table)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[table.c.user_id, table.c.dimension, table.c.key],
+            set_={name: table.c[name] + stmt.excluded[name] for name in SUMMARY_COUNTERS})
+        db.session.execute(stmt, rows)
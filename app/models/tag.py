@@ -1,15 +1,30 @@
 from typing import List
+from bisect import bisect_left
 import sqlalchemy as sa
 import sqlalchemy.orm as so
-from app.models.base import BaseModel
+from app import db
+from app.models.base import BaseModel, SearchableMixin, dialect_insert
 from app.models.trade import trade_tags
+from app.utils.cache import TTLCache
 
+# Each user's full tag list for autocomplete, shared by all requests in this process
+tag_cache = TTLCache(maxsize=1024, ttl=300)
 
-class Tag(BaseModel):
+# Users with more tags than this are searched in SQL instead of being cached
+MAX_CACHED_TAGS = 500
+
+
+class Tag(SearchableMixin, BaseModel):
     __tablename__ = 'tag'
+    __searchable__ = ['name']
+    __search_stored__ = ['user_id']
 
     name: so.Mapped[str] = so.mapped_column(sa.String(50), nullable=False)
 
+    # Bumped by the database on every UPDATE, so trade ETags change when a tag is renamed
+    revision: so.Mapped[int] = so.mapped_column(sa.Integer, nullable=False, default=1, server_default='1',
+                                                onupdate=sa.text('revision + 1'))
+
     # Foreign key to user (one-to-many)
     user_id: so.Mapped[str] = so.mapped_column(sa.ForeignKey('user.id'), nullable=False)
 
@@ -19,8 +34,85 @@ class Tag(BaseModel):
     trades: so.Mapped[List["Trade"]] = so.relationship(secondary=trade_tags, back_populates="tags")
 
     # Unique constraint for user-tag combination (user cannot have duplicate tag names)
-    __table_args__ = (sa.UniqueConstraint('name', 'user_id', name='unique_user_tag'),)
+    __table_args__ = (sa.UniqueConstraint('name', 'user_id', name='unique_user_tag'),
+                      sa.Index('ix_tag_user_lower_name', 'user_id', sa.func.lower(name)))
 
     def __repr__(self):
         return f"<Tag {self.name}>"
 
+    @classmethod
+    def ensure_names(cls, user_id, names):
+        """Create any of the user's tags that don't exist yet, return {name: id} for all names.
+
+        Missing tags go in with one INSERT ... ON CONFLICT DO NOTHING and ids are read back
+        with one IN query. Does not commit.
+        """
+        names = set(names)
+        if not names:
+            return {}
+        db.session.execute(dialect_insert(cls).on_conflict_do_nothing(index_elements=['name', 'user_id']),
+                           [{'name': name, 'user_id': user_id} for name in names])
+        ids = dict(db.session.execute(
+            sa.select(cls.name, cls.id).where(cls.user_id == user_id, cls.name.in_(names))).all())
+        cls.track_documents({tag_id: {'name': name, 'user_id': user_id} for name, tag_id in ids.items()})
+        db.session.info.setdefault('stale_tag_users', set()).add(user_id)
+        return ids
+
+    @classmethod
+    def for_user(cls, user_id):
+        """The user's tags as sorted [(lowercased name, id, name)], None if there are too many to cache"""
+        tags = tag_cache.get(user_id)
+        if tags is None:
+            rows = db.session.execute(sa.select(cls.id, cls.name).where(cls.user_id == user_id)
+                                      .limit(MAX_CACHED_TAGS + 1)).all()
+            if len(rows) > MAX_CACHED_TAGS:
+                return None
+            tags = sorted((name.lower(), tag_id, name) for tag_id, name in rows)
+            tag_cache.set(user_id, tags)
+        return tags
+
+    @classmethod
+    def autocomplete(cls, user_id, prefix, page, per_page):
+        """([{'id', 'name'}], total) for the user's tags starting with prefix, case-insensitively.
+
+        Served from the per-user cache; users with very many tags get a range scan on
+        ix_tag_user_lower_name instead.
+        """
+        prefix = prefix.lower()
+        offset = (page - 1) * per_page
+        tags = cls.for_user(user_id)
+        if tags is not None:
+            start = bisect_left(tags, (prefix,))
+            stop = bisect_left(tags, (prefix + '\uffff',), start)
+            matches = tags[start:stop]
+            return [{'id': tag_id, 'name': name} for _, tag_id, name in matches[offset:offset + per_page]], len(matches)
+
+        lower = sa.func.lower(cls.name)
+        criteria = [cls.user_id == user_id, lower >= prefix, lower < prefix + '\uffff']
+        total = db.session.scalar(sa.select(sa.func.count()).select_from(cls).where(*criteria))
+        rows = db.session.execute(sa.select(cls.id, cls.name).where(*criteria)
+                                  .order_by(lower, cls.id).limit(per_page).offset(offset)).all()
+        return [{'id': tag_id, 'name': name} for tag_id, name in rows], total
+
+
+def _mark_cached_tags_stale(mapper, connection, target):
+    # Evicted once the change is committed; evicting at flush would let a concurrent
+    # request cache the pre-commit tag list again
+    so.object_session(target).info.setdefault('stale_tag_users', set()).add(target.user_id)
+
+
+def _invalidate_cached_tags(session):
+    for user_id in session.info.pop('stale_tag_users', ()):
+        tag_cache.pop(user_id)
+
+
+def _discard_stale_tags(session):
+    session.info.pop('stale_tag_users', None)
+
+
+sa.event.listen(Tag, 'after_insert', _mark_cached_tags_stale)
+sa.event.listen(Tag, 'after_update', _mark_cached_tags_stale)
+sa.event.listen(Tag, 'after_delete', _mark_cached_tags_stale)
+sa.event.listen(db.session, 'after_commit', _invalidate_cached_tags)
+sa.event.listen(db.session, 'after_rollback', _discard_stale_tags)
+
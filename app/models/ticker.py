@@ -1,12 +1,14 @@
 from typing import List
 import sqlalchemy as sa
 import sqlalchemy.orm as so
-from app.models.base import BaseModel
+from app.models.base import BaseModel, SearchableMixin
 from datetime import datetime, timezone
 
 
-class Ticker(BaseModel):
+class Ticker(SearchableMixin, BaseModel):
     __tablename__ = 'ticker'
+    __searchable__ = ['symbol', 'name']
+    __search_stored__ = ['exchange', 'is_active']
 
     symbol: so.Mapped[str] = so.mapped_column(sa.String(20), nullable=False, index=True, unique=True)
     exchange: so.Mapped[str] = so.mapped_column(sa.String(20), nullable=False)
@@ -14,6 +16,13 @@ class Ticker(BaseModel):
     name: so.Mapped[str] = so.mapped_column(sa.String(200), nullable=False, index=True)
     last_price: so.Mapped[float] = so.mapped_column(sa.Float, default=0.0, nullable=False)
     last_updated: so.Mapped[datetime] = so.mapped_column(sa.DateTime(timezone=True), nullable=False, default=datetime.now(timezone.utc))
+    # Instruments that drop out of the daily instrument sync are deactivated, not deleted, trades keep pointing at them
+    is_active: so.Mapped[bool] = so.mapped_column(sa.Boolean, nullable=False, default=True, server_default=sa.true(),
+                                                  index=True)
+    # When the instrument metadata last changed in a sync, unlike last_updated which follows prices
+    synced_at: so.Mapped[datetime] = so.mapped_column(sa.DateTime(timezone=True), nullable=False, index=True,
+                                                      default=lambda: datetime.now(timezone.utc),
+                                                      server_default=sa.func.current_timestamp())
 
     # Relationships
     trades: so.Mapped[List["Trade"]] = so.relationship(back_populates='ticker')
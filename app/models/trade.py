@@ -1,12 +1,15 @@
 from __future__ import annotations
+from collections import defaultdict
 from typing import List, Optional
 import sqlalchemy as sa
 import sqlalchemy.orm as so
 from app import db
 from app.models.base import BaseModel
+from app.models.summary import SummaryDelta
 from app.models.utils import TradeStatus, TradeTimeframe, trade_side_enum, \
     trade_type_enum, trade_status_enum, trade_timeframe_enum, trade_eta_enum, TradeSide, TradeETA, TradeType
 from datetime import datetime, timezone
+from decimal import Decimal, ROUND_HALF_UP
 
 # Many-to-many relationship with tags
 trade_tags = sa.Table('trade_tags',
@@ -58,6 +61,24 @@ class Trade(BaseModel):
     updated_at: so.Mapped[Optional[datetime]] = so.mapped_column(sa.DateTime(timezone=True), nullable=True,
                                                                  default=lambda: datetime.now(timezone.utc))
 
+    # Risk/reward, generated by the database from side/entry/stoploss/target so they can be filtered,
+    # sorted and indexed in SQL
+    risk_per_unit: so.Mapped[Optional[float]] = so.mapped_column(sa.Float, sa.Computed(
+        f"CASE WHEN stoploss IS NULL OR stoploss = 0 THEN NULL "
+        f"WHEN side = '{TradeSide.BUY}' THEN entry - stoploss ELSE stoploss - entry END", persisted=True))
+    reward_per_unit: so.Mapped[Optional[float]] = so.mapped_column(sa.Float, sa.Computed(
+        f"CASE WHEN target IS NULL OR target = 0 THEN NULL "
+        f"WHEN side = '{TradeSide.BUY}' THEN target - entry ELSE entry - target END", persisted=True))
+    risk_reward_ratio: so.Mapped[Optional[float]] = so.mapped_column(sa.Float, sa.Computed(
+        f"CASE WHEN stoploss IS NULL OR stoploss = 0 OR target IS NULL OR target = 0 THEN NULL "
+        f"ELSE ROUND(CAST((CASE WHEN side = '{TradeSide.BUY}' THEN target - entry ELSE entry - target END) / "
+        f"NULLIF(CASE WHEN side = '{TradeSide.BUY}' THEN entry - stoploss ELSE stoploss - entry END, 0) "
+        f"AS NUMERIC), 1) END", persisted=True))
+
+    # Bumped by the database on every UPDATE, used to build cheap ETags
+    revision: so.Mapped[int] = so.mapped_column(sa.Integer, nullable=False, default=1, server_default='1',
+                                                onupdate=sa.text('revision + 1'))
+
     # Foreign keys
     user_id: so.Mapped[str] = so.mapped_column(sa.ForeignKey("user.id"), index=True, nullable=False)
     ticker_id: so.Mapped[str] = so.mapped_column(sa.ForeignKey("ticker.id"), index=True, nullable=False)
@@ -67,6 +88,16 @@ class Trade(BaseModel):
     ticker: so.Mapped["Ticker"] = so.relationship(back_populates="trades")
     tags: so.Mapped[List["Tag"]] = so.relationship(secondary=trade_tags, back_populates="trades")
 
+    # Composite indexes backing the keyset-paginated, filtered trade listing
+    __table_args__ = (
+        sa.Index('ix_trade_user_updated_at', 'user_id', 'updated_at', 'id'),
+        sa.Index('ix_trade_user_created_at', 'user_id', 'created_at', 'id'),
+        sa.Index('ix_trade_user_score', 'user_id', 'score', 'id'),
+        sa.Index('ix_trade_user_status', 'user_id', 'status'),
+        sa.Index('ix_trade_user_symbol', 'user_id', 'symbol'),
+        sa.Index('ix_trade_user_risk_reward', 'user_id', 'risk_reward_ratio', 'id'),
+    )
+
     def __repr__(self):
 
         return f'<Trade {self.symbol} - {self.type} {self.side}>'
@@ -75,26 +106,17 @@ class Trade(BaseModel):
     def last_price(self):
         return self.ticker.last_price
 
-    @property
-    def risk_reward_ratio(self):
-        if not self.stoploss or not self.target:
+    @staticmethod
+    def calculate_risk_reward(side, entry, stoploss, target):
+        """Risk/reward ratio from raw values, rounded the same way as the persisted column"""
+        if not stoploss or not target:
             return None
-        try:
-            return round(self.reward_per_unit / self.risk_per_unit, 1)
-        except ZeroDivisionError:
-            return None
-
-    @property
-    def risk_per_unit(self):
-        if not self.stoploss:
-            return None
-        return self.entry - self.stoploss if self.side == TradeSide.BUY else self.stoploss - self.entry
-
-    @property
-    def reward_per_unit(self):
-        if not self.target:
+        risk = entry - stoploss if side == TradeSide.BUY else stoploss - entry
+        reward = target - entry if side == TradeSide.BUY else entry - target
+        if not risk:
             return None
-        return self.target - self.entry if self.side == TradeSide.BUY else self.entry - self.target
+        # SQL ROUND() rounds the decimal representation half away from zero
+        return float(Decimal(repr(reward / risk)).quantize(Decimal('0.1'), rounding=ROUND_HALF_UP))
 
     # Add these methods to your existing Trade model in app/models/trade.py
 
@@ -113,6 +135,7 @@ class Trade(BaseModel):
 
         now = datetime.now(timezone.utc)
         status_changed = False
+        previous_status = self.status
         candle_high = candle.high
         candle_low = candle.low
 
@@ -234,12 +257,19 @@ class Trade(BaseModel):
         if status_changed:
             self.status_updated_at = now
             self.updated_at = now
+
+            delta = SummaryDelta()
+            tag_ids = [tag.id for tag in self.tags]
+            delta.add(self.user_id, previous_status, self.timeframe, self.risk_reward_ratio, tag_ids, sign=-1)
+            delta.add(self.user_id, self.status, self.timeframe, self.risk_reward_ratio, tag_ids)
+            delta.apply()
+
             db.session.commit()
 
         return status_changed
 
     def update_etas(self):
-        """Update ETA fields based on current price and trade parameters"""
+        """Update ETA fields based on current price and trade parameters, without committing"""
 
         current_price = self.last_price
 
@@ -267,16 +297,19 @@ class Trade(BaseModel):
             self.stoploss_eta = None
             self.target_eta = None
 
-        db.session.commit()
-
     def _calculate_eta(self, price_to_check):
         """Calculate ETA based on price difference"""
+        return self.calculate_eta(price_to_check, self.last_price)
+
+    @staticmethod
+    def calculate_eta(price_to_check, last_price):
+        """Calculate ETA of price_to_check from last_price, usable without a Trade instance"""
 
         if not price_to_check:
             return TradeETA.FAR
 
         # Calculate percentage difference
-        price_diff_percent = abs((price_to_check - self.last_price) / self.last_price) * 100
+        price_diff_percent = abs((price_to_check - last_price) / last_price) * 100
 
         # Define ETA based on percentage difference
         if price_diff_percent <= 0.1:  # 0.1%
@@ -296,6 +329,57 @@ class Trade(BaseModel):
         else:
             return TradeETA.FAR
 
+    @classmethod
+    def insert_many(cls, rows, chunk_size=1000):
+        """Bulk INSERT trade rows and their trade_tags links in chunks, without committing.
+
+        Each row is a dict of column values with an explicit id, plus an optional
+        'tag_ids' list. Trade summaries are updated in the same transaction.
+        """
+        delta = SummaryDelta()
+        for row in rows:
+            delta.add(row['user_id'], row.get('status'), row.get('timeframe'),
+                      cls.calculate_risk_reward(row['side'], row['entry'], row.get('stoploss'), row.get('target')),
+                      row.get('tag_ids', ()))
+        delta.apply()
+
+        for start in range(0, len(rows), chunk_size):
+            chunk = rows[start:start + chunk_size]
+            links = [{'trade_id': row['id'], 'tag_id': tag_id}
+                     for row in chunk for tag_id in dict.fromkeys(row.get('tag_ids', ()))]
+            db.session.execute(sa.insert(cls), [{k: v for k, v in row.items() if k != 'tag_ids'} for row in chunk])
+            if links:
+                db.session.execute(trade_tags.insert(), links)
+
+    @classmethod
+    def delete_where(cls, *criteria, chunk_size=500):
+        """Set-based DELETE of matching trades and their trade_tags rows, without committing.
+
+        Trades are never loaded into the session and trade summaries are updated from
+        the deleted rows in the same transaction. Returns the deleted ids.
+        """
+        rows = db.session.execute(sa.select(cls.id, cls.user_id, cls.status, cls.timeframe, cls.risk_reward_ratio)
+                                  .where(*criteria)).all()
+        ids = [row.id for row in rows]
+
+        tag_ids = defaultdict(list)
+        for start in range(0, len(ids), chunk_size):
+            chunk = ids[start:start + chunk_size]
+            for trade_id, tag_id in db.session.execute(
+                    sa.select(trade_tags.c.trade_id, trade_tags.c.tag_id).where(trade_tags.c.trade_id.in_(chunk))):
+                tag_ids[trade_id].append(tag_id)
+
+        delta = SummaryDelta()
+        for row in rows:
+            delta.add(row.user_id, row.status, row.timeframe, row.risk_reward_ratio, tag_ids[row.id], sign=-1)
+        delta.apply()
+
+        for start in range(0, len(ids), chunk_size):
+            chunk = ids[start:start + chunk_size]
+            db.session.execute(trade_tags.delete().where(trade_tags.c.trade_id.in_(chunk)))
+            db.session.execute(sa.delete(cls).where(cls.id.in_(chunk)).execution_options(synchronize_session=False))
+        return ids
+
     @classmethod
     def update_all_etas(cls):
         """Update ETAs for all active trades - can be called periodically"""
@@ -2,7 +2,7 @@ from typing import Optional, List
 import sqlalchemy as sa
 import sqlalchemy.orm as so
 from app.models.base import BaseModel
-from werkzeug.security import generate_password_hash, check_password_hash
+from app.utils.passwords import password_hasher
 
 
 class User(BaseModel):
@@ -20,14 +20,20 @@ class User(BaseModel):
     # Relationships
     trades: so.Mapped[List["Trade"]] = so.relationship(back_populates='user', cascade="all, delete-orphan")
     tags: so.Mapped[List["Tag"]] = so.relationship(back_populates="user", cascade="all, delete-orphan")
+    summaries: so.Mapped[List["TradeSummary"]] = so.relationship(back_populates="user", cascade="all, delete-orphan")
+
+    __table_args__ = (sa.Index('ix_user_created_at', 'created_at', 'id'),)
 
     def set_password(self, password):
-        self.password_hash = generate_password_hash(password)
+        self.password_hash = password_hasher.hash(password)
 
     def check_password(self, password):
         if not self.password_hash:
             return False
-        return check_password_hash(self.password_hash, password)
+        return password_hasher.verify(self.password_hash, password)
+
+    def password_needs_rehash(self):
+        return bool(self.password_hash) and password_hasher.needs_rehash(self.password_hash)
 
     def __repr__(self):
         return f"<User name={self.name}, email={self.email}>"
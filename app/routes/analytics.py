@@ -0,0 +1,51 @@
+from flask import Blueprint, jsonify
+from flask_jwt_extended import jwt_required
+from app import db
+from app.models import Tag, TradeSummary
+from app.utils.auth import get_current_user
+
+analytics_bp = Blueprint('analytics', __name__)
+
+
+def summary_dict(summary):
+    return {
+        'total': summary.total,
+        'active': summary.active,
+        'entry': summary.entry,
+        'target': summary.target,
+        'stoploss': summary.stoploss,
+        'win_rate': summary.win_rate,
+        'avg_risk_reward': summary.avg_risk_reward,
+    }
+
+
+# -----------------------
+# PORTFOLIO SUMMARY
+# -----------------------
+@analytics_bp.route('/summary', methods=['GET'])
+@jwt_required()
+def get_summary():
+    current_user = get_current_user()
+
+    # Summary rows are per user/dimension, so this never touches the trade table
+    summaries = TradeSummary.query.filter_by(user_id=current_user.id).all()
+    tag_names = dict(db.session.query(Tag.id, Tag.name).filter(Tag.user_id == current_user.id).all())
+
+    overall = TradeSummary(total=0, active=0, entry=0, target=0, stoploss=0, rr_sum=0.0, rr_count=0)
+    by_timeframe = []
+    by_tag = []
+    for summary in summaries:
+        if summary.dimension == TradeSummary.ALL:
+            overall = summary
+        elif summary.total == 0:
+            continue
+        elif summary.dimension == TradeSummary.TIMEFRAME:
+            by_timeframe.append(dict(summary_dict(summary), timeframe=summary.key))
+        elif summary.dimension == TradeSummary.TAG and summary.key in tag_names:
+            by_tag.append(dict(summary_dict(summary), tag_id=summary.key, name=tag_names[summary.key]))
+
+    return jsonify({
+        'summary': summary_dict(overall),
+        'by_timeframe': sorted(by_timeframe, key=lambda row: row['timeframe']),
+        'by_tag': sorted(by_tag, key=lambda row: row['name']),
+    })
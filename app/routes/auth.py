@@ -1,9 +1,10 @@
 from flask import Blueprint, request, jsonify, current_app
-from flask_jwt_extended import create_access_token, create_refresh_token, jwt_required, get_jwt_identity
+from flask_jwt_extended import create_access_token, jwt_required, get_jwt_identity
 from app import db
 from app.models.user import User
-from app.utils.auth import verify_google_token
+from app.utils.auth import verify_google_token, create_tokens, load_user
 from app.utils.schemas import UserRegistrationSchema, UserLoginSchema, UserSchema
+from app.utils.passwords import PasswordHasherBusy
 from marshmallow import ValidationError
 
 
@@ -37,8 +38,7 @@ def register():
         db.session.commit()
 
         # Create tokens
-        access_token = create_access_token(identity=user.id)
-        refresh_token = create_refresh_token(identity=user.id)
+        access_token, refresh_token = create_tokens(user)
 
         return jsonify({
             'message': 'User created successfully',
@@ -64,8 +64,16 @@ def login():
     if not user or not user.check_password(data['password']):
         return jsonify({'error': 'Invalid email or password'}), 401
 
-    access_token = create_access_token(identity=user.id)
-    refresh_token = create_refresh_token(identity=user.id)
+    # Upgrade the stored hash when the configured hashing parameters changed, unless the
+    # hashing pool is saturated; the next login will try again
+    if user.password_needs_rehash():
+        try:
+            user.set_password(data['password'])
+            db.session.commit()
+        except PasswordHasherBusy:
+            current_app.logger.warning(f"Skipped password rehash for user {user.id}, hasher busy")
+
+    access_token, refresh_token = create_tokens(user)
 
     return jsonify({
         'message': 'Login successful',
@@ -108,8 +116,7 @@ def google_login():
     try:
         db.session.commit()
 
-        access_token = create_access_token(identity=user.id)
-        refresh_token = create_refresh_token(identity=user.id)
+        access_token, refresh_token = create_tokens(user)
 
         return jsonify({
             'message': 'Google login successful',
@@ -132,7 +139,7 @@ def refresh():
     if not user:
         return jsonify({'error': 'User not found'}), 404
 
-    new_access_token = create_access_token(identity=user_id)
+    new_access_token = create_access_token(identity=user_id, additional_claims={'is_admin': bool(user.is_admin)})
 
     return jsonify({
         'access_token': new_access_token,
@@ -145,7 +152,7 @@ def refresh():
 def get_current_user():
 
     user_id = get_jwt_identity()
-    user = User.query.get(user_id)
+    user = load_user(user_id)
 
     if not user:
         return jsonify({'error': 'User not found'}), 404
@@ -1,5 +1,5 @@
 from flask import Blueprint, request, jsonify, current_app
-from flask_jwt_extended import jwt_required
+from flask_jwt_extended import jwt_required, get_jwt_identity
 from app.models import Tag
 from app.utils.schemas import TagReadSchema
 
@@ -18,16 +18,18 @@ def search_tags():
     page = request.args.get('page', 1, type=int)
     per_page = request.args.get('per_page', 20, type=int)
 
-    if current_app.elastic_search and query:
-        # Use Elasticsearch
-        tags, total = Tag.search(query, page, per_page)
-    else:
-        # Fallback to SQLAlchemy search
-        tags = []
-        total = 0
-        if query:
-            tags = Tag.query.filter(Tag.name.ilike(f'{query}%')).all()
-            total = len(tags)
+    page = max(page, 1)
+    per_page = min(max(per_page, 1), 100)
+
+    # Only the current user's tags
+    tags = []
+    total = 0
+    if query and current_app.search_backend:
+        # Substring matches from the configured search index, served from the hits
+        tags, total = Tag.search(query, page, per_page, filters={'user_id': get_jwt_identity()})
+    elif query:
+        # Prefix matches, usually straight from the per-user cache
+        tags, total = Tag.autocomplete(get_jwt_identity(), query, page, per_page)
 
     return jsonify({
         'tags': tags_schema.dump(tags),
@@ -1,8 +1,11 @@
 from flask import Blueprint, request, jsonify, current_app
 from flask_jwt_extended import jwt_required
 import sqlalchemy as sa
+from app import db
 from app.models import Ticker
 from app.utils.schemas import TickerSchema
+from app.utils.etag import conditional, make_etag
+from app.utils.ticker_index import ticker_index
 
 tickers_bp = Blueprint('tickers', __name__)
 
@@ -12,23 +15,33 @@ tickers_schema = TickerSchema(many=True)
 # -----------------------
 # SEARCH TICKERS
 # -----------------------
+def tickers_etag():
+    """Version of the ticker table, changes when tickers are synced or prices tick"""
+    count, created, synced, priced = db.session.execute(
+        sa.select(sa.func.count(Ticker.id), sa.func.max(Ticker.created_at), sa.func.max(Ticker.synced_at),
+                  sa.func.max(Ticker.last_updated))).one()
+    return make_etag(sorted(request.args.items(multi=True)), count, created, synced, priced)
+
+
 @tickers_bp.route('/', methods=['GET'])
 @jwt_required()
+@conditional(tickers_etag)
 def search_tickers():
     query = request.args.get('q', '', type=str)
     page = request.args.get('page', 1, type=int)
     per_page = request.args.get('per_page', 10, type=int)
 
-    if current_app.elastic_search and query:
-        # Use Elasticsearch
-        tickers, total = Ticker.search(query, page, per_page)
-    else:
-        # Fallback to SQLAlchemy search
-        tickers = []
-        total = 0
-        if query:
-            tickers = Ticker.query.filter(sa.or_(Ticker.symbol.ilike(f'{query}%'), Ticker.name.ilike(f'%{query}%'))).all()
-            total = len(tickers)
+    page = max(page, 1)
+    per_page = min(max(per_page, 1), 100)
+
+    tickers = []
+    total = 0
+    if query and current_app.search_backend:
+        # The configured search index, prices come from the rows themselves
+        tickers, total = Ticker.search(query, page, per_page, hydrate=True, filters={'is_active': True})
+    elif query:
+        # In-memory symbol/name index, only the requested page is loaded from the database
+        tickers, total = ticker_index.page(query, page, per_page)
 
     return jsonify({
         'tickers': tickers_schema.dump(tickers),
@@ -1,44 +1,263 @@
-from flask import Blueprint, request, jsonify
-from flask_jwt_extended import jwt_required
+import io
+import uuid
+import csv
+import zlib
+from flask import Blueprint, request, jsonify, Response, stream_with_context
+from flask_jwt_extended import jwt_required, get_jwt_identity
+import sqlalchemy as sa
+import sqlalchemy.orm as so
 from app import db
-from app.models import Trade, Ticker, Tag, TradeSide, TradeType
+from app.models import Trade, Ticker, Tag, trade_tags, TradeSide, TradeType, TradeStatus, TradeTimeframe, SummaryDelta
 from app.utils.schemas import TradeReadSchema, TradeCreateSchema, TradeUpdateSchema
 from app.utils.auth import get_current_user
+from app.utils.serializers import compile_serializer, json_response, dumps
+from app.utils.etag import conditional, make_etag
 from marshmallow import ValidationError
 from datetime import datetime, timezone
 
 trades_bp = Blueprint('trades', __name__)
 
 trade_read_schema = TradeReadSchema()
-trades_read_schema = TradeReadSchema(many=True)
+dump_trade = compile_serializer(trade_read_schema)
 trade_create_schema = TradeCreateSchema()
 trade_update_schema = TradeUpdateSchema()
 
+# Load everything TradeReadSchema touches (ticker, last_price, tags) up front
+trade_read_options = (so.joinedload(Trade.ticker), so.selectinload(Trade.tags))
+
 
 # -----------------------
 # GET all trades
 # -----------------------
+TRADE_SORT_FIELDS = {
+    'updated_at': Trade.updated_at,
+    'created_at': Trade.created_at,
+    'score': Trade.score,
+    'risk_reward_ratio': Trade.risk_reward_ratio,
+}
+TRADE_DATE_FIELDS = {
+    'updated_at': Trade.updated_at,
+    'created_at': Trade.created_at,
+}
+TRADE_FILTERS = {
+    'status': (Trade.status, [TradeStatus.ACTIVE, TradeStatus.ENTRY, TradeStatus.STOPLOSS, TradeStatus.TARGET]),
+    'side': (Trade.side, [TradeSide.BUY, TradeSide.SELL]),
+    'timeframe': (Trade.timeframe, [TradeTimeframe.MINUTE, TradeTimeframe.FIVE_MINUTES, TradeTimeframe.FIFTEEN_MINUTES,
+                                    TradeTimeframe.HOUR, TradeTimeframe.DAY, TradeTimeframe.WEEK,
+                                    TradeTimeframe.MONTH]),
+}
+
+
+def parse_trade_list_args(args):
+    """Validate the listing query string, returns (options, errors)"""
+    errors = {}
+    options = {
+        'sort': args.get('sort', 'updated_at', type=str),
+        'order': args.get('order', 'desc', type=str),
+        'date_field': args.get('date_field', 'updated_at', type=str),
+        'per_page': min(max(args.get('per_page', 50, type=int), 1), 200),
+        'cursor': args.get('cursor', None, type=str),
+        'symbols': [s.upper() for s in args.getlist('symbol') if s],
+        'tags': [t for t in args.getlist('tag') if t],
+    }
+
+    if options['sort'] not in TRADE_SORT_FIELDS:
+        errors['sort'] = [f'Must be one of: {", ".join(TRADE_SORT_FIELDS)}.']
+    if options['order'] not in ('asc', 'desc'):
+        errors['order'] = ['Must be one of: asc, desc.']
+    if options['date_field'] not in TRADE_DATE_FIELDS:
+        errors['date_field'] = [f'Must be one of: {", ".join(TRADE_DATE_FIELDS)}.']
+
+    for name, (_, allowed) in TRADE_FILTERS.items():
+        values = [v for v in args.getlist(name) if v]
+        invalid = [v for v in values if v not in allowed]
+        if invalid:
+            errors[name] = [f'Must be one of: {", ".join(allowed)}.']
+        options[name] = values
+
+    for name in ('min_risk_reward', 'max_risk_reward'):
+        options[name] = None
+        value = args.get(name, None, type=str)
+        if value:
+            try:
+                options[name] = float(value)
+            except ValueError:
+                errors[name] = ['Not a valid number.']
+
+    for name in ('from', 'to'):
+        value = args.get(name, None, type=str)
+        options[name] = None
+        if value:
+            try:
+                parsed = datetime.fromisoformat(value)
+                options[name] = parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+            except ValueError:
+                errors[name] = ['Not a valid datetime.']
+
+    return options, errors
+
+
+def trades_etag():
+    """Version of the user's whole trade list.
+
+    Changes on any trade insert/update/delete, price tick, ticker sync or change to the user's tags.
+    """
+    user_id = get_jwt_identity()
+    tag_count = sa.select(sa.func.count(Tag.id)).where(Tag.user_id == user_id).scalar_subquery()
+    tag_revisions = sa.select(sa.func.sum(Tag.revision)).where(Tag.user_id == user_id).scalar_subquery()
+    row = db.session.execute(
+        sa.select(sa.func.count(Trade.id), sa.func.sum(Trade.revision), sa.func.max(Trade.created_at),
+                  sa.func.max(Ticker.last_updated), sa.func.max(Ticker.synced_at), tag_count, tag_revisions)
+        .join(Ticker, Trade.ticker_id == Ticker.id)
+        .where(Trade.user_id == user_id)).one()
+    return make_etag(user_id, sorted(request.args.items(multi=True)), *row)
+
+
 @trades_bp.route('/', methods=['GET'])
 @jwt_required()
+@conditional(trades_etag)
 def get_trades():
     current_user = get_current_user()
-    trades = Trade.query.filter_by(user_id=current_user.id).order_by(Trade.updated_at.desc()).all()
+    options, errors = parse_trade_list_args(request.args)
+    if errors:
+        return jsonify({'error': 'Validation error', 'details': errors}), 400
 
-    return jsonify({
-        'trades': trades_read_schema.dump(trades),
-        'total': len(trades),
+    query = Trade.query.filter(Trade.user_id == current_user.id)
+
+    for name, (column, _) in TRADE_FILTERS.items():
+        if options[name]:
+            query = query.filter(column.in_(options[name]))
+    if options['symbols']:
+        query = query.filter(Trade.symbol.in_(options['symbols']))
+    if options['tags']:
+        query = query.filter(Trade.tags.any(sa.and_(Tag.user_id == current_user.id, Tag.name.in_(options['tags']))))
+
+    if options['min_risk_reward'] is not None:
+        query = query.filter(Trade.risk_reward_ratio >= options['min_risk_reward'])
+    if options['max_risk_reward'] is not None:
+        query = query.filter(Trade.risk_reward_ratio <= options['max_risk_reward'])
+
+    date_column = TRADE_DATE_FIELDS[options['date_field']]
+    if options['from']:
+        query = query.filter(date_column >= options['from'])
+    if options['to']:
+        query = query.filter(date_column <= options['to'])
+
+    total = query.order_by(None).count()
+
+    try:
+        trades, next_cursor = Trade.keyset_paginate(
+            query.options(*trade_read_options),
+            TRADE_SORT_FIELDS[options['sort']],
+            Trade.id,
+            options['cursor'],
+            options['per_page'],
+            descending=options['order'] == 'desc')
+    except ValueError as e:
+        return jsonify({'error': 'Validation error', 'details': {'cursor': [str(e)]}}), 400
+
+    return json_response({
+        'trades': [dump_trade(trade) for trade in trades],
+        'total': total,
+        'per_page': options['per_page'],
+        'next_cursor': next_cursor,
     })
 
 
+# -----------------------
+# EXPORT all trades
+# -----------------------
+EXPORT_BATCH_SIZE = 500
+EXPORT_CSV_FIELDS = [name for name in trade_read_schema.dump_fields if name != 'ticker']
+
+
+def iter_export_batches(user_id):
+    """Yield lists of serialized trades, streamed from a server-side cursor"""
+    stmt = sa.select(Trade).options(*trade_read_options).where(Trade.user_id == user_id) \
+        .order_by(Trade.created_at, Trade.id).execution_options(yield_per=EXPORT_BATCH_SIZE)
+    for batch in db.session.scalars(stmt).partitions():
+        yield [dump_trade(trade) for trade in batch]
+
+
+def iter_ndjson(batches):
+    for batch in batches:
+        yield b''.join(dumps(row) + b'\n' for row in batch)
+
+
+def iter_csv(batches):
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=EXPORT_CSV_FIELDS, extrasaction='ignore')
+    writer.writeheader()
+    for batch in batches:
+        for row in batch:
+            row['tags'] = ';'.join(tag['name'] for tag in row['tags'] or [])
+            writer.writerow(row)
+        yield buffer.getvalue().encode()
+        buffer.seek(0)
+        buffer.truncate()
+    # Header-only export still yields the header
+    if buffer.tell():
+        yield buffer.getvalue().encode()
+
+
+def iter_gzip(chunks):
+    compressor = zlib.compressobj(wbits=31)
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+@trades_bp.route('/export', methods=['GET'])
+@jwt_required()
+def export_trades():
+    current_user = get_current_user()
+    export_format = request.args.get('format', 'ndjson', type=str)
+
+    if export_format == 'ndjson':
+        chunks, mimetype = iter_ndjson(iter_export_batches(current_user.id)), 'application/x-ndjson'
+    elif export_format == 'csv':
+        chunks, mimetype = iter_csv(iter_export_batches(current_user.id)), 'text/csv'
+    else:
+        return jsonify({'error': 'Validation error', 'details': {'format': ['Must be one of: ndjson, csv.']}}), 400
+
+    headers = {
+        'Content-Disposition': f'attachment; filename=trades.{export_format}',
+        'Vary': 'Accept-Encoding',
+    }
+    if 'gzip' in request.accept_encodings:
+        chunks = iter_gzip(chunks)
+        headers['Content-Encoding'] = 'gzip'
+
+    return Response(stream_with_context(chunks), mimetype=mimetype, headers=headers)
+
+
 # -----------------------
 # GET single trade
 # -----------------------
+def trade_etag(trade_id):
+    user_id = get_jwt_identity()
+    # Links deleted along with a tag don't touch the trade row, so the count is included
+    tags = sa.select(sa.func.count(Tag.id)).join(trade_tags, trade_tags.c.tag_id == Tag.id) \
+        .where(trade_tags.c.trade_id == trade_id)
+    row = db.session.execute(
+        sa.select(Trade.revision, Ticker.last_updated, Ticker.synced_at, tags.scalar_subquery(),
+                  tags.with_only_columns(sa.func.sum(Tag.revision)).scalar_subquery())
+        .join(Ticker, Trade.ticker_id == Ticker.id)
+        .where(Trade.id == trade_id, Trade.user_id == user_id)).first()
+    if row is None:
+        return None
+    return make_etag(user_id, trade_id, *row)
+
+
 @trades_bp.route('/<trade_id>', methods=['GET'])
 @jwt_required()
+@conditional(trade_etag)
 def get_trade(trade_id):
     current_user = get_current_user()
-    trade = Trade.query.filter_by(id=trade_id, user_id=current_user.id).first_or_404()
-    return jsonify({'trade': trade_read_schema.dump(trade)})
+    trade = Trade.query.options(*trade_read_options).filter_by(id=trade_id, user_id=current_user.id).first_or_404()
+    return json_response({'trade': dump_trade(trade)})
 
 
 # -----------------------
@@ -77,14 +296,122 @@ def create_trade():
 
     try:
         db.session.add(trade)
-        db.session.commit()
+        db.session.flush()
+
+        delta = SummaryDelta()
+        delta.add_trade(trade)
+        delta.apply()
+
         trade.update_etas()
-        return jsonify({'message': 'Trade created successfully', 'trade': trade_read_schema.dump(trade)}), 201
+
+        db.session.commit()
+        return json_response({'message': 'Trade created successfully', 'trade': dump_trade(trade)}, 201)
     except Exception as e:
         db.session.rollback()
         return jsonify({'error': 'Failed to create trade'}), 500
 
 
+# -----------------------
+# CREATE trades in bulk
+# -----------------------
+BULK_CREATE_LIMIT = 1000
+
+
+@trades_bp.route('/bulk', methods=['POST'])
+@jwt_required()
+def create_trades_bulk():
+    current_user = get_current_user()
+    items = (request.json or {}).get('trades')
+
+    if not items or not isinstance(items, list):
+        return jsonify({'error': 'trades must be a non-empty list'}), 400
+    if len(items) > BULK_CREATE_LIMIT:
+        return jsonify({'error': f'At most {BULK_CREATE_LIMIT} trades can be created at once'}), 400
+
+    # Validate every item, keep errors keyed by position in the request
+    errors = {}
+    loaded = {}
+    for index, item in enumerate(items):
+        try:
+            loaded[index] = trade_create_schema.load(item)
+        except ValidationError as e:
+            errors[index] = e.messages
+
+    # Resolve all tickers with one IN query
+    ticker_ids = {data['ticker_id'] for data in loaded.values()}
+    tickers = {ticker.id: ticker for ticker in Ticker.query.filter(Ticker.id.in_(ticker_ids))} if ticker_ids else {}
+    for index, data in list(loaded.items()):
+        if data['ticker_id'] not in tickers:
+            errors[index] = {'ticker_id': ['Ticker not found.']}
+            del loaded[index]
+
+    if not loaded:
+        return jsonify({'error': 'Validation error', 'details': errors}), 400
+
+    now = datetime.now(timezone.utc)
+    tag_names = {t['name'] for data in loaded.values() for t in data.get('tags', [])}
+
+    try:
+        tag_ids = Tag.ensure_names(current_user.id, tag_names)
+
+        trade_rows = []
+        for data in loaded.values():
+            ticker = tickers[data.pop('ticker_id')]
+            tags_input = data.pop('tags', [])
+            trade_rows.append(dict(
+                data, id=str(uuid.uuid4()), symbol=ticker.symbol, ticker_id=ticker.id, user_id=current_user.id,
+                updated_at=now,
+                type=TradeType.CROSSING_ABOVE if data['entry'] >= ticker.last_price else TradeType.CROSSING_BELOW,
+                entry_eta=Trade.calculate_eta(data['entry'], ticker.last_price) if ticker.last_price else None,
+                tag_ids=[tag_ids[t['name']] for t in tags_input]))
+
+        Trade.insert_many(trade_rows)
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': 'Failed to create trades'}), 500
+
+    created = Trade.query.options(*trade_read_options).filter(Trade.id.in_([row['id'] for row in trade_rows])) \
+        .order_by(Trade.created_at, Trade.id).all()
+
+    return json_response({
+        'message': f'{len(created)} trade(s) created successfully',
+        'trades': [dump_trade(trade) for trade in created],
+        'errors': errors,
+    }, 201)
+
+
+# -----------------------
+# IMPORT trades from CSV
+# -----------------------
+@trades_bp.route('/import', methods=['POST'])
+@jwt_required()
+def import_trades_csv():
+    # pandas is only needed here, so it's imported on first use rather than at startup
+    from app.utils.trade_import import import_trades, TradeImportError
+
+    current_user = get_current_user()
+    file = request.files.get('file')
+    if not file:
+        return jsonify({'error': 'A CSV file is required in the "file" field'}), 400
+
+    try:
+        created, errors = import_trades(file.stream, current_user.id)
+        db.session.commit()
+    except TradeImportError as e:
+        db.session.rollback()
+        return jsonify({'error': 'Invalid import file', 'message': str(e)}), 400
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': 'Failed to import trades'}), 500
+
+    return jsonify({
+        'message': f'{created} trade(s) imported successfully',
+        'created': created,
+        'errors': errors,
+    }), 201 if created else 400
+
+
 # -----------------------
 # UPDATE trade
 # -----------------------
@@ -101,6 +428,9 @@ def update_trade(trade_id):
     except ValidationError as e:
         return jsonify({'error': 'Validation error', 'details': e.messages}), 400
 
+    delta = SummaryDelta()
+    delta.remove_trade(trade)
+
     # Update all fields except user_id and tags
     for field, value in data.items():
         if hasattr(trade, field) and field not in ('user_id', 'tags'):
@@ -122,11 +452,15 @@ def update_trade(trade_id):
         # Assign new tags to trade (remove missing tags from trade, don't delete tags)
         trade.tags = new_tags
 
-    trade.update_etas()
-
     try:
+        db.session.flush()
+        delta.add_trade(trade)
+        delta.apply()
+
+        trade.update_etas()
+
         db.session.commit()
-        return jsonify({'message': 'Trade updated successfully', 'trade': trade_read_schema.dump(trade)})
+        return json_response({'message': 'Trade updated successfully', 'trade': dump_trade(trade)})
     except Exception as e:
         db.session.rollback()
         return jsonify({'error': 'Failed to update trade'}), 500
@@ -141,6 +475,10 @@ def delete_trade(trade_id):
     current_user = get_current_user()
     trade = Trade.query.filter_by(id=trade_id, user_id=current_user.id).first_or_404()
     try:
+        delta = SummaryDelta()
+        delta.remove_trade(trade)
+        delta.apply()
+
         db.session.delete(trade)
         db.session.commit()
         return jsonify({'message': 'Trade deleted successfully'})
@@ -162,17 +500,31 @@ def delete_multiple_trades():
     if not trade_ids or not isinstance(trade_ids, list):
         return jsonify({'error': 'trade_ids must be a non-empty list'}), 400
 
-    # Fetch trades that belong to the user
-    trades_to_delete = Trade.query.filter(Trade.id.in_(trade_ids), Trade.user_id == current_user.id).all()
+    try:
+        deleted_ids = Trade.delete_where(Trade.user_id == current_user.id, Trade.id.in_(trade_ids))
+        if not deleted_ids:
+            db.session.rollback()
+            return jsonify({'error': 'No matching trades found'}), 404
+        db.session.commit()
+        return jsonify({'message': f'{len(deleted_ids)} trade(s) deleted successfully', 'deleted_ids': deleted_ids})
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': 'Failed to delete trades'}), 500
+
 
-    if not trades_to_delete:
-        return jsonify({'error': 'No matching trades found'}), 404
+# -----------------------
+# DELETE all closed trades
+# -----------------------
+@trades_bp.route('/closed', methods=['DELETE'])
+@jwt_required()
+def delete_closed_trades():
+    current_user = get_current_user()
 
     try:
-        for trade in trades_to_delete:
-            db.session.delete(trade)
+        deleted_ids = Trade.delete_where(Trade.user_id == current_user.id,
+                                         Trade.status.in_([TradeStatus.STOPLOSS, TradeStatus.TARGET]))
         db.session.commit()
-        return jsonify({'message': f'{len(trades_to_delete)} trade(s) deleted successfully'})
+        return jsonify({'message': f'{len(deleted_ids)} trade(s) deleted successfully', 'deleted_ids': deleted_ids})
     except Exception as e:
         db.session.rollback()
         return jsonify({'error': 'Failed to delete trades'}), 500
@@ -1,28 +1,97 @@
-from flask import Blueprint, request, jsonify
+from datetime import datetime, timezone
+from flask import Blueprint, request, jsonify, Response, stream_with_context
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from marshmallow import ValidationError
+import sqlalchemy as sa
 from app import db
-from app.models.user import User
+from app.models import User, Trade, TradeStatus
 from app.utils.schemas import UserSchema
-from app.utils.auth import admin_required
+from app.utils.auth import admin_required, is_admin, load_user
+from app.utils.serializers import compile_serializer, json_response, dumps
 
 users_bp = Blueprint('users', __name__)
 
 user_schema = UserSchema()
-users_schema = UserSchema(many=True)
+dump_user = compile_serializer(user_schema)
+
+USERS_BATCH_SIZE = 1000
 
 
 # ---------------- GET ALL USERS ----------------
+def parse_bool_arg(value):
+    if value is None or value == '':
+        return None
+    if value.lower() in ('1', 'true', 'yes'):
+        return True
+    if value.lower() in ('0', 'false', 'no'):
+        return False
+    raise ValueError('Not a valid boolean.')
+
+
+def parse_datetime_arg(value):
+    if not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(value)
+    except ValueError:
+        raise ValueError('Not a valid datetime.')
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+
+def iter_users_ndjson(query):
+    """Stream users as NDJSON from a server-side cursor, one batch at a time"""
+    stmt = query.order_by(User.created_at, User.id).statement.execution_options(yield_per=USERS_BATCH_SIZE)
+    for batch in db.session.scalars(stmt).partitions():
+        yield b''.join(dumps(dump_user(user)) + b'\n' for user in batch)
+
+
 @users_bp.route('/', methods=['GET'])
 @jwt_required()
 def get_all_users():
+    errors = {}
+    filters = {}
+    for name, parse in (('is_admin', parse_bool_arg), ('has_active_trades', parse_bool_arg),
+                        ('from', parse_datetime_arg), ('to', parse_datetime_arg)):
+        try:
+            filters[name] = parse(request.args.get(name, None, type=str))
+        except ValueError as e:
+            errors[name] = [str(e)]
+    per_page = min(max(request.args.get('per_page', 50, type=int), 1), 500)
+    cursor = request.args.get('cursor', None, type=str)
+    export_format = request.args.get('format', 'json', type=str)
+    if export_format not in ('json', 'ndjson'):
+        errors['format'] = ['Must be one of: json, ndjson.']
+    if errors:
+        return jsonify({'error': 'Validation error', 'details': errors}), 400
+
+    query = User.query
+    if filters['is_admin'] is not None:
+        query = query.filter(User.is_admin == filters['is_admin'])
+    if filters['from']:
+        query = query.filter(User.created_at >= filters['from'])
+    if filters['to']:
+        query = query.filter(User.created_at <= filters['to'])
+    if filters['has_active_trades'] is not None:
+        active = sa.exists().where(Trade.user_id == User.id,
+                                   Trade.status.in_([TradeStatus.ACTIVE, TradeStatus.ENTRY]))
+        query = query.filter(active if filters['has_active_trades'] else ~active)
+
+    if export_format == 'ndjson':
+        return Response(stream_with_context(iter_users_ndjson(query)), mimetype='application/x-ndjson',
+                        headers={'Content-Disposition': 'attachment; filename=users.ndjson'})
+
+    total = query.order_by(None).count()
+    try:
+        users, next_cursor = User.keyset_paginate(query, User.created_at, User.id, cursor, per_page,
+                                                  descending=False)
+    except ValueError as e:
+        return jsonify({'error': 'Validation error', 'details': {'cursor': [str(e)]}}), 400
 
-    users = User.query.all()
-    total = len(users)
-
-    return jsonify({
-        'users': users_schema.dump(users),
+    return json_response({
+        'users': [dump_user(user) for user in users],
         'total': total,
+        'per_page': per_page,
+        'next_cursor': next_cursor,
     })
 
 
@@ -31,13 +100,14 @@ def get_all_users():
 @jwt_required()
 def get_user(user_id):
     current_user_id = get_jwt_identity()
-    current_user = User.query.get_or_404(current_user_id)
 
     # Users can only view their own profile unless admin
-    if user_id != current_user_id and not current_user.is_admin:
+    if user_id != current_user_id and not is_admin():
         return jsonify({'error': 'Access denied'}), 403
 
-    user = User.query.get_or_404(user_id)
+    user = load_user(user_id)
+    if not user:
+        return jsonify({'error': 'Resource not found'}), 404
     return jsonify({'user': user_schema.dump(user)})
 
 
@@ -46,10 +116,9 @@ def get_user(user_id):
 @jwt_required()
 def update_user(user_id):
     current_user_id = get_jwt_identity()
-    current_user = User.query.get_or_404(current_user_id)
 
     # Users can only update their own profile unless admin
-    if user_id != current_user_id and not current_user.is_admin:
+    if user_id != current_user_id and not is_admin():
         return jsonify({'error': 'Access denied'}), 403
 
     user = User.query.get_or_404(user_id)
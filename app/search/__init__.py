@@ -0,0 +1,59 @@
+"""Search over searchable models, through whichever backend the app is configured with.
+
+SEARCH_BACKEND selects 'elasticsearch' (ELASTICSEARCH_URL) or 'database', which uses
+SQLite FTS5 or Postgres trigram indexes in the app's own database. The functions here
+are no-ops, or return no hits, when no backend is configured.
+"""
+import sqlalchemy as sa
+from flask import current_app
+from app.search.elastic import ElasticsearchBackend, LazyElasticsearch, search_indexer
+from app.search.database import DatabaseBackend, SQLiteBackend, PostgresBackend
+
+DATABASE_BACKENDS = {'sqlite': SQLiteBackend, 'postgresql': PostgresBackend}
+
+
+def make_backend(app):
+    name = app.config['SEARCH_BACKEND']
+    if name == 'elasticsearch':
+        return ElasticsearchBackend(app.elastic_search) if app.elastic_search else None
+    if name == 'database':
+        dialect = sa.engine.make_url(app.config['SQLALCHEMY_DATABASE_URI']).get_backend_name()
+        backend = DATABASE_BACKENDS.get(dialect)
+        return backend() if backend else None
+    return None
+
+
+def get_backend():
+    return getattr(current_app, 'search_backend', None)
+
+
+def create_index(index, model):
+    backend = get_backend()
+    if backend:
+        backend.create_index(index, model)
+
+
+def add_to_index(index, model):
+    backend = get_backend()
+    if backend:
+        backend.add_to_index(index, model)
+
+
+def remove_from_index(index, model):
+    backend = get_backend()
+    if backend:
+        backend.remove_from_index(index, model)
+
+
+def query_index(index, query, page, per_page, fields=None, filters=None):
+    backend = get_backend()
+    if not backend:
+        return [], 0
+    return backend.query_index(index, query, page, per_page, fields, filters)
+
+
+def reindex_all(index, model_class, **kwargs):
+    backend = get_backend()
+    if not backend:
+        return None
+    return backend.reindex_all(index, model_class, **kwargs)
@@ -0,0 +1,181 @@
+import re
+from abc import ABC, abstractmethod
+import sqlalchemy as sa
+from app import db
+
+WORD = re.compile(r'\w+')
+
+
+def like_pattern(word):
+    """%word% with LIKE wildcards in word escaped (backslash is the escape character)"""
+    return '%' + word.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_') + '%'
+
+
+def model_for(index):
+    """Mapped class whose table is index"""
+    for mapper in db.Model.registry.mappers:
+        if getattr(mapper.class_, '__tablename__', None) == index:
+            return mapper.class_
+    raise LookupError(f"No model for search index {index}")
+
+
+class DatabaseBackend(ABC):
+    """Search tables in the app's own database instead of an external cluster.
+
+    Index structures are built by create_index (reindex.py) and the database keeps them
+    in sync with the table, so add_to_index and remove_from_index have nothing to do.
+    Hits have the same shape as Elasticsearch ones.
+    """
+
+    @abstractmethod
+    def _statements(self, index, model):
+        """DDL that (re)creates the index structures for model"""
+
+    @abstractmethod
+    def _search(self, index, model, words, page, per_page, fields, filters):
+        """(hits, total) for rows matching every word, filtered by {column: value}"""
+
+    def create_index(self, index, model):
+        with db.engine.begin() as connection:
+            for statement in self._statements(index, model):
+                connection.exec_driver_sql(statement)
+
+    def add_to_index(self, index, model):
+        pass
+
+    def remove_from_index(self, index, model):
+        pass
+
+    def query_index(self, index, query, page, per_page, fields=None, filters=None):
+        model = model_for(index)
+        words = query.split()
+        if not words:
+            return [], 0
+        try:
+            return self._search(index, model, words, page, per_page, fields or model.__searchable__, filters or {})
+        except Exception as e:
+            print(f"Error performing search: {str(e)}")
+            return [], 0
+
+    def reindex_all(self, index, model_class, progress=print, **kwargs):
+        self.create_index(index, model_class)
+        if progress:
+            progress(f"{index}: rebuilt search index")
+        return index
+
+    @staticmethod
+    def _filter(filters, params, table):
+        """WHERE conditions for equality filters on table's columns, adding their parameters"""
+        conditions = []
+        for column, value in filters.items():
+            params[f'f_{column}'] = value
+            conditions.append(f'{table}{column} = :f_{column}')
+        return conditions
+
+    @staticmethod
+    def _hits(rows, model):
+        fields = ['id'] + model.search_fields()
+        return [dict(zip(fields, row)) for row in rows]
+
+
+class SQLiteBackend(DatabaseBackend):
+    """FTS5 table per model with the trigram tokenizer, maintained by triggers.
+
+    Trigrams give case-insensitive substring matching like the ngram analyzer; words
+    shorter than three characters fall back to LIKE over the FTS table. The FTS table
+    keeps its own copy of the text and the row's id, since the implicit rowid of a table
+    with a string primary key can change on VACUUM.
+    """
+
+    def _statements(self, index, model):
+        fts = f'{index}_fts'
+        columns = model.__searchable__
+        names = ', '.join(columns)
+        new = ', '.join(f'new.{column}' for column in columns)
+        insert = f'INSERT INTO {fts}(id, {names}) VALUES (new.id, {new});'
+        delete = f'DELETE FROM {fts} WHERE id = old.id;'
+        return [
+            f'DROP TABLE IF EXISTS {fts}',
+            f"CREATE VIRTUAL TABLE {fts} USING fts5(id UNINDEXED, {names}, tokenize='trigram')",
+            f'DROP TRIGGER IF EXISTS {fts}_ai',
+            f'DROP TRIGGER IF EXISTS {fts}_ad',
+            f'DROP TRIGGER IF EXISTS {fts}_au',
+            f'CREATE TRIGGER {fts}_ai AFTER INSERT ON "{index}" BEGIN {insert} END',
+            f'CREATE TRIGGER {fts}_ad AFTER DELETE ON "{index}" BEGIN {delete} END',
+            # Only indexed columns, so e.g. ticker price updates don't touch the FTS table
+            f'CREATE TRIGGER {fts}_au AFTER UPDATE OF id, {names} ON "{index}" BEGIN {delete} {insert} END',
+            f'INSERT INTO {fts}(id, {names}) SELECT id, {names} FROM "{index}"',
+        ]
+
+    def _search(self, index, model, words, page, per_page, fields, filters):
+        fts = f'{index}_fts'
+        params = {}
+        match = []
+        conditions = []
+        for i, word in enumerate(words):
+            if len(word) >= 3:
+                match.append('"' + word.replace('"', '""') + '"')
+            else:
+                params[f'w{i}'] = like_pattern(word)
+                conditions.append('(' + ' OR '.join(f"{fts}.{field} LIKE :w{i} ESCAPE '\\'" for field in fields) + ')')
+        if match:
+            params['match'] = '{' + ' '.join(fields) + '}: (' + ' AND '.join(match) + ')'
+            conditions.insert(0, f'{fts} MATCH :match')
+        conditions += self._filter(filters, params, 't.')
+        source = f'{fts} JOIN "{index}" t ON t.id = {fts}.id WHERE ' + ' AND '.join(conditions)
+
+        total = db.session.execute(sa.text(f'SELECT count(*) FROM {source}'), params).scalar()
+        if not total:
+            return [], 0
+
+        columns = ', '.join(f't.{column}' for column in ['id'] + model.search_fields())
+        order = f'{fts}.rank, {fts}.rowid' if match else f'{fts}.rowid'
+        rows = db.session.execute(sa.text(
+            f'SELECT {columns} FROM {source} ORDER BY {order} LIMIT :limit OFFSET :offset'),
+            dict(params, limit=per_page, offset=(page - 1) * per_page)).all()
+        return self._hits(rows, model), total
+
+
+class PostgresBackend(DatabaseBackend):
+    """pg_trgm and tsvector expression indexes over the searchable columns.
+
+    Postgres maintains expression indexes itself, so no triggers or side tables are
+    needed. Every word must appear as a substring (trigram GIN index), and hits are
+    ranked by prefix word matches (tsvector GIN index) plus trigram similarity.
+    """
+
+    @staticmethod
+    def _document(model):
+        return "lower(" + " || ' ' || ".join(f'coalesce({column}, \'\')' for column in model.__searchable__) + ")"
+
+    def _statements(self, index, model):
+        document = self._document(model)
+        return [
+            'CREATE EXTENSION IF NOT EXISTS pg_trgm',
+            f'CREATE INDEX IF NOT EXISTS ix_{index}_search_trgm ON "{index}" USING gin (({document}) gin_trgm_ops)',
+            f"CREATE INDEX IF NOT EXISTS ix_{index}_search_tsv ON \"{index}\" "
+            f"USING gin (to_tsvector('simple', {document}))",
+        ]
+
+    def _search(self, index, model, words, page, per_page, fields, filters):
+        document = self._document(model)
+        params = {f'w{i}': like_pattern(word.lower()) for i, word in enumerate(words)}
+        conditions = [f'{document} LIKE :w{i}' for i in range(len(words))]
+        where = ' AND '.join(conditions + self._filter(filters, params, ''))
+
+        total = db.session.execute(sa.text(f'SELECT count(*) FROM "{index}" WHERE {where}'), params).scalar()
+        if not total:
+            return [], 0
+
+        params['query'] = ' '.join(words).lower()
+        rank = f'similarity({document}, :query)'
+        terms = WORD.findall(params['query'])
+        if terms:
+            params['prefix'] = ' & '.join(f'{term}:*' for term in terms)
+            rank += f" + ts_rank(to_tsvector('simple', {document}), to_tsquery('simple', :prefix))"
+
+        columns = ', '.join(['id'] + model.search_fields())
+        rows = db.session.execute(sa.text(
+            f'SELECT {columns} FROM "{index}" WHERE {where} ORDER BY {rank} DESC, id LIMIT :limit OFFSET :offset'),
+            dict(params, limit=per_page, offset=(page - 1) * per_page)).all()
+        return self._hits(rows, model), total
@@ -0,0 +1,434 @@
+import time
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from datetime import datetime, timezone
+import sqlalchemy as sa
+from app import db
+
+# Bulk item statuses worth retrying: rejected under load or a shard briefly unavailable
+RETRY_STATUSES = {429, 502, 503, 504}
+
+# While reindex_all builds a new index, this alias points at it so live changes from every
+# process are written there too. Indexers look the alias up before every bulk request, so a
+# change committed after reindex_all added the alias can't miss the new index.
+REBUILD_SUFFIX = '-rebuild'
+
+
+def rebuild_alias(index):
+    return index + REBUILD_SUFFIX
+
+
+class LazyElasticsearch:
+    """Elasticsearch client that is only imported and built on first use"""
+
+    def __init__(self, url):
+        self.url = url
+        self._client = None
+        self._lock = threading.Lock()
+
+    def __getattr__(self, name):
+        if self._client is None:
+            with self._lock:
+                if self._client is None:
+                    from elasticsearch import Elasticsearch
+                    self._client = Elasticsearch([self.url])
+        return getattr(self._client, name)
+
+
+def bulk_operations(changes, action='index'):
+    """_bulk request body for {(index, id): document or None}, None meaning delete.
+
+    Documents are written with action ('index', or 'create' to never overwrite). Rebuild
+    aliases must exist, so a write to a finished rebuild can't auto-create an index.
+    """
+    operations = []
+    for (index, doc_id), document in changes.items():
+        meta = {'_index': index, '_id': doc_id}
+        if index.endswith(REBUILD_SUFFIX):
+            meta['require_alias'] = True
+        if document is None:
+            operations.append({'delete': meta})
+        else:
+            operations.append({action: meta})
+            operations.append(document)
+    return operations
+
+
+def send_bulk(client, changes, max_retries=5, backoff=0.5, action='index'):
+    """Send changes as one _bulk request, retrying rejected items with exponential backoff.
+
+    Returns the number of changes that could not be applied. Deletes of missing documents,
+    creates of existing ones and writes to a rebuild that has just finished are not errors.
+    """
+    attempt = 0
+    dropped = 0
+    while changes:
+        failed = {}
+        try:
+            response = client.bulk(operations=bulk_operations(changes, action))
+        except Exception as e:
+            print(f"Error sending bulk index request: {str(e)}")
+            failed = changes
+        else:
+            # Items come back in request order, one per change
+            for key, item in zip(changes, response['items']):
+                kind, result = next(iter(item.items()))
+                status = result.get('status', 500)
+                missing = status == 404 and (kind == 'delete' or key[0].endswith(REBUILD_SUFFIX))
+                exists = status == 409 and kind == 'create'
+                if status in RETRY_STATUSES:
+                    failed[key] = changes[key]
+                elif status >= 300 and not (missing or exists):
+                    print(f"Error indexing document {key}: {result.get('error')}")
+                    dropped += 1
+
+        changes = failed
+        if changes:
+            attempt += 1
+            if attempt > max_retries:
+                print(f"Giving up on {len(changes)} search index changes after {max_retries} retries")
+                return dropped + len(changes)
+            time.sleep(backoff * 2 ** (attempt - 1))
+    return dropped
+
+
+class SearchIndexer:
+    """Applies index changes through the _bulk API on a background thread.
+
+    submit() takes {(index, id): document or None} (None deletes) and returns immediately.
+    The worker coalesces everything queued since its last request, keeps only the latest
+    change per document, sends up to batch_size operations per request and retries failed
+    items with exponential backoff. Changes to an index that reindex_all is rebuilding are
+    also written to the new index. With no client configured, submit() is a no-op.
+    """
+
+    def __init__(self, client=None, batch_size=500, max_retries=5, backoff=0.5):
+        self.client = client
+        self.batch_size = batch_size
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self._queue = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+        self._rebuilding = set()
+
+    def configure(self, client, batch_size=500, max_retries=5, backoff=0.5):
+        self.client = client
+        self.batch_size = batch_size
+        self.max_retries = max_retries
+        self.backoff = backoff
+
+    @property
+    def enabled(self):
+        return self.client is not None
+
+    def submit(self, changes):
+        if not self.enabled or not changes:
+            return
+        self._ensure_worker()
+        self._queue.put(changes)
+
+    def flush(self):
+        """Block until everything submitted so far has been sent (or given up on)"""
+        self._queue.join()
+
+    def _ensure_worker(self):
+        # Also restarts the worker in a forked child, where the parent's thread doesn't exist
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='search-indexer', daemon=True)
+                self._thread.start()
+
+    def _rebuilding_indices(self):
+        """Indices with a rebuild in progress.
+
+        Looked up before every request rather than cached: everything being sent was committed
+        before the lookup, so if it finds no rebuild alias, any rebuild starting later streams
+        rows that already include these changes. One alias lookup per bulk request is the
+        price of not having to wait for indexers to notice a rebuild.
+        """
+        from elasticsearch.exceptions import NotFoundError
+
+        try:
+            aliases = self.client.indices.get_alias(name='*' + REBUILD_SUFFIX)
+            self._rebuilding = {alias[:-len(REBUILD_SUFFIX)]
+                                for index in aliases.values() for alias in index.get('aliases', {})}
+        except NotFoundError:
+            self._rebuilding = set()
+        except Exception as e:
+            # Keep the last known state rather than silently stop writing to a rebuild
+            print(f"Error checking for index rebuilds: {str(e)}")
+        return self._rebuilding
+
+    def _with_rebuilds(self, changes):
+        rebuilding = self._rebuilding_indices()
+        if not rebuilding:
+            return changes
+        changes = dict(changes)
+        changes.update({(rebuild_alias(index), doc_id): document
+                        for (index, doc_id), document in list(changes.items()) if index in rebuilding})
+        return changes
+
+    def _run(self):
+        while True:
+            pending = dict(self._queue.get())
+            taken = 1
+            while len(pending) < self.batch_size:
+                try:
+                    pending.update(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+                taken += 1
+
+            try:
+                items = list(self._with_rebuilds(pending).items())
+                for start in range(0, len(items), self.batch_size):
+                    send_bulk(self.client, dict(items[start:start + self.batch_size]), self.max_retries,
+                              self.backoff)
+            except Exception as e:
+                print(f"Error in search indexer: {str(e)}")
+            finally:
+                for _ in range(taken):
+                    self._queue.task_done()
+
+
+search_indexer = SearchIndexer()
+
+
+def index_mapping(model):
+    """Index settings and mappings with an ngram analyzer for partial matching"""
+    # Get field names from the model's __searchable__
+    fields = getattr(model, '__searchable__', [])
+    stored = getattr(model, '__search_stored__', [])
+    field_mappings = {
+        field: {
+            "type": "text",
+            "analyzer": "ngram_analyzer",
+            "search_analyzer": "standard",
+            "fields": {
+                "keyword": {
+                    "type": "keyword",
+                    "ignore_above": 256
+                }
+            }
+        } for field in fields
+    }
+    # Returned in _source and usable in filters, but not analyzed for matching
+    columns = model.__table__.columns
+    field_mappings.update({field: {"type": "boolean" if isinstance(columns[field].type, sa.Boolean) else "keyword"}
+                           for field in stored})
+
+    return {
+        "settings": {
+            "analysis": {
+                "analyzer": {
+                    "ngram_analyzer": {
+                        "tokenizer": "ngram_tokenizer",
+                        "filter": ["lowercase"]
+                    }
+                },
+                "tokenizer": {
+                    "ngram_tokenizer": {
+                        "type": "ngram",
+                        "min_gram": 3,
+                        "max_gram": 4,  # Reduced from 10 to comply with max_ngram_diff
+                        "token_chars": ["letter", "digit"]
+                    }
+                }
+            },
+            "index": {
+                "max_ngram_diff": 1  # Explicitly set the limit
+            }
+        },
+        "mappings": {
+            "properties": field_mappings
+        }
+    }
+
+
+def versioned_name(index):
+    return f"{index}-{datetime.now(timezone.utc).strftime('%Y%m%d%H%M%S%f')}"
+
+
+def swap_alias(client, alias, new_index):
+    """Atomically point alias at new_index and drop the indices it pointed at before.
+
+    A concrete index named like the alias (from before indices were versioned) is removed
+    in the same request, so searches never see a missing index.
+    """
+    actions = [{'add': {'index': new_index, 'alias': alias}}]
+    old = []
+    if client.indices.exists_alias(name=alias):
+        old = [name for name in client.indices.get_alias(name=alias) if name != new_index]
+        actions = [{'remove': {'index': name, 'alias': alias}} for name in old] + actions
+    elif client.indices.exists(index=alias):
+        actions.append({'remove_index': {'index': alias}})
+
+    client.indices.update_aliases(actions=actions)
+    for name in old:
+        client.indices.delete(index=name, ignore_unavailable=True)
+
+
+class ElasticsearchBackend:
+    """Search through an Elasticsearch cluster, indices are aliases over versioned indices"""
+
+    def __init__(self, client):
+        self.client = client
+
+    def create_index(self, index, model):
+        """Create an empty versioned index for model and point the alias index at it"""
+        client = self.client
+        try:
+            new_index = versioned_name(index)
+            client.indices.create(index=new_index, **index_mapping(model))
+            swap_alias(client, index, new_index)
+        except Exception as e:
+            print(f"Error creating index: {str(e)}")
+
+    def add_to_index(self, index, model):
+        """Add a model to the search index"""
+        payload = model.search_document()
+
+        try:
+            self.client.index(index=index, id=model.id, document=payload)
+        except Exception as e:
+            print(f"Error indexing document: {str(e)}")
+
+    def remove_from_index(self, index, model):
+        """Remove a model from the search index"""
+        from elasticsearch.exceptions import NotFoundError
+
+        try:
+            self.client.delete(index=index, id=model.id)
+        except NotFoundError:
+            pass  # Ignore if document wasn't found
+        except Exception as e:
+            print(f"Error removing document: {str(e)}")
+
+    def query_index(self, index, query, page, per_page, fields=None, filters=None):
+        """Search the index with support for partial matching.
+
+        Returns ([{'id': ..., **_source}, ...], total) in ranking order. Queries match all
+        analyzed fields unless fields is given; filters ({field: value}, fields from
+        __search_stored__) must match exactly.
+        """
+        try:
+            search = self.client.search(
+                index=index,
+                body={
+                    "query": {
+                        "bool": {
+                            "should": [
+                                {
+                                    "multi_match": {
+                                        "query": query,
+                                        "fields": fields or ["*"],
+                                        "fuzziness": "AUTO"
+                                    }
+                                },
+                                {
+                                    "multi_match": {
+                                        "query": query,
+                                        "fields": fields or ["*"],
+                                        "type": "phrase_prefix"
+                                    }
+                                }
+                            ],
+                            "minimum_should_match": 1,
+                            "filter": [{"term": {field: value}} for field, value in (filters or {}).items()]
+                        }
+                    }
+                },
+                from_=(page - 1) * per_page,
+                size=per_page
+            )
+
+            hits = [dict(hit['_source'], id=hit['_id']) for hit in search['hits']['hits']]
+            return hits, search['hits']['total']['value']
+        except Exception as e:
+            print(f"Error performing search: {str(e)}")
+            return [], 0
+
+    def reindex_all(self, index, model_class, batch_size=1000, workers=4, progress=print):
+        """Rebuild the index for model_class without interrupting searches or losing updates.
+
+        The new versioned index gets a rebuild alias first, so from then on every process's
+        SearchIndexer writes live changes to it as well as to the old index. Rows are then
+        streamed from the database batch_size at a time, with up to workers bulk requests in
+        flight, as creates that never overwrite a newer live write. Rows deleted after they
+        were streamed are removed again, then the alias is swapped over and the old index
+        dropped. Returns the new index name, or None if the rebuild failed.
+        """
+        client = self.client
+        new_index = versioned_name(index)
+        total = db.session.scalar(sa.select(sa.func.count()).select_from(model_class))
+        stats = {'done': 0, 'failed': 0}
+        streamed = []
+        lock = threading.Lock()
+
+        def send(changes):
+            failed = send_bulk(client, changes, action='create')
+            with lock:
+                stats['done'] += len(changes)
+                stats['failed'] += failed
+
+        def load(stmt):
+            in_flight = set()
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                for batch in db.session.scalars(stmt.execution_options(yield_per=batch_size)).partitions():
+                    changes = {(new_index, obj.id): obj.search_document() for obj in batch}
+                    streamed.extend(obj.id for obj in batch)
+                    if len(in_flight) >= workers:
+                        done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                        for future in done:
+                            future.result()
+                    in_flight.add(executor.submit(send, changes))
+
+                    if progress:
+                        elapsed = time.monotonic() - clock
+                        progress(f"{index}: {stats['done']}/{total} documents, "
+                                 f"{stats['done'] / elapsed if elapsed else 0:.0f} docs/s")
+                for future in wait(in_flight).done:
+                    future.result()
+
+        def remove_deleted():
+            # A row deleted after it was read gets its delete before the stale create lands
+            for start in range(0, len(streamed), batch_size):
+                ids = streamed[start:start + batch_size]
+                existing = set(db.session.scalars(sa.select(model_class.id).where(model_class.id.in_(ids))))
+                deleted = {(new_index, doc_id): None for doc_id in ids if doc_id not in existing}
+                if deleted:
+                    send_bulk(client, deleted)
+
+        try:
+            # No refreshes or replicas while loading, both are restored before the swap
+            mapping = index_mapping(model_class)
+            mapping['settings']['index'].update({'refresh_interval': '-1', 'number_of_replicas': 0})
+            client.indices.create(index=new_index, **mapping)
+            # The alias is in the cluster state once this returns, and every indexer looks it up
+            # before sending, so anything committed from here on reaches the new index too, even
+            # if its row was streamed before the change
+            client.indices.update_aliases(actions=[{'add': {'index': new_index, 'alias': rebuild_alias(index)}}])
+
+            clock = time.monotonic()
+            load(sa.select(model_class))
+            db.session.rollback()  # New snapshot for the deletion check
+            remove_deleted()
+
+            client.indices.put_settings(index=new_index, settings={'index': {'refresh_interval': None,
+                                                                             'number_of_replicas': None}})
+            client.indices.refresh(index=new_index)
+            swap_alias(client, index, new_index)
+            client.indices.update_aliases(actions=[{'remove': {'index': new_index, 'alias': rebuild_alias(index)}}])
+        except Exception as e:
+            print(f"Error reindexing all documents: {str(e)}")
+            client.indices.delete(index=new_index, ignore_unavailable=True)
+            return None
+
+        if progress:
+            elapsed = time.monotonic() - clock
+            progress(f"{index}: indexed {stats['done'] - stats['failed']}/{total} documents into {new_index} "
+                     f"in {elapsed:.1f}s ({stats['done'] / elapsed if elapsed else 0:.0f} docs/s), "
+                     f"{stats['failed']} failed")
+        return new_index
@@ -1,19 +1,90 @@
 from functools import wraps
-from flask import jsonify, current_app
-from flask_jwt_extended import verify_jwt_in_request, get_jwt_identity
+from flask import jsonify, current_app, g
+from flask_jwt_extended import verify_jwt_in_request, get_jwt_identity, create_access_token, \
+    create_refresh_token
+import sqlalchemy as sa
+import sqlalchemy.orm as so
+from app import db
 from app.models.user import User
-import requests
+from app.utils.cache import TTLCache
+from app.utils.jwks import JWKSCache
 import jwt as pyjwt
 
+# Identity snapshots of recently used users, shared by all requests in this process
+user_cache = TTLCache()
+
+# What identity and admin checks read; secrets like password_hash are never cached
+CACHED_USER_FIELDS = ('id', 'name', 'email', 'is_admin')
+
+# Google's OAuth signing keys, shared by all requests in this process
+google_jwks = JWKSCache('https://www.googleapis.com/oauth2/v3/certs')
+
+
+def _mark_cached_user_stale(mapper, connection, target):
+    # Evicted once the change is committed; evicting at flush would let a concurrent
+    # request cache the old row (old is_admin, or a deleted user) again
+    so.object_session(target).info.setdefault('stale_users', set()).add(target.id)
+
+
+def _invalidate_cached_users(session):
+    for user_id in session.info.pop('stale_users', ()):
+        user_cache.pop(user_id)
+
+
+def _discard_stale_users(session):
+    session.info.pop('stale_users', None)
+
+
+sa.event.listen(User, 'after_update', _mark_cached_user_stale)
+sa.event.listen(User, 'after_delete', _mark_cached_user_stale)
+sa.event.listen(db.session, 'after_commit', _invalidate_cached_users)
+sa.event.listen(db.session, 'after_rollback', _discard_stale_users)
+
+
+def load_user(user_id):
+    """Load a user from the process-wide cache, falling back to the database.
+
+    Cached users are merged into the current session without emitting SQL; only
+    CACHED_USER_FIELDS are filled in, any other column is loaded when first accessed.
+    """
+    values = user_cache.get(user_id)
+    if values is not None:
+        user = User(**values)
+        so.make_transient_to_detached(user)
+        return db.session.merge(user, load=False)
+
+    user = db.session.get(User, user_id)
+    if user:
+        user_cache.set(user_id, {field: getattr(user, field) for field in CACHED_USER_FIELDS})
+    return user
+
+
+def create_tokens(user):
+    """Access and refresh tokens for user, with is_admin embedded as a claim for clients.
+
+    The server doesn't trust the claim for authorization, see is_admin().
+    """
+    claims = {'is_admin': bool(user.is_admin)}
+    return (create_access_token(identity=user.id, additional_claims=claims),
+            create_refresh_token(identity=user.id, additional_claims=claims))
+
+
+def is_admin():
+    """Admin check against the user row through the user cache, not the token's claim.
+
+    Access tokens live for a day, so a revoked admin would otherwise keep admin access
+    until theirs expired; this way it's gone within USER_CACHE_TTL at most.
+    """
+    user = get_current_user()
+    return bool(user and user.is_admin)
+
 
 def admin_required(f):
     @wraps(f)
     def decorated(*args, **kwargs):
         try:
             verify_jwt_in_request()
-            user_id = get_jwt_identity()
-            user = User.query.get(user_id)
-            if not user or not user.is_admin:
+            if not is_admin():
                 return jsonify({'error': 'Admin access required'}), 403
             return f(*args, **kwargs)
         except Exception as e:
@@ -23,10 +94,14 @@ def admin_required(f):
 
 
 def get_current_user():
+    """The authenticated user, resolved once per request"""
     try:
         verify_jwt_in_request()
         user_id = get_jwt_identity()
-        return User.query.get(user_id)
+        cached = g.get('current_user')
+        if cached is None or cached[0] != user_id:
+            cached = g.current_user = (user_id, load_user(user_id))
+        return cached[1]
     except:
         return None
 
@@ -34,27 +109,13 @@ def get_current_user():
 def verify_google_token(token):
     """Verify Google OAuth token"""
     try:
-        # Get Google's public keys
-        response = requests.get('https://www.googleapis.com/oauth2/v3/certs')
-        keys = response.json()
-
         # Decode token header to get key id
         unverified_header = pyjwt.get_unverified_header(token)
-        key_id = unverified_header.get('kid')
-
-        # Find the correct key
-        key = None
-        for k in keys['keys']:
-            if k['kid'] == key_id:
-                key = k
-                break
+        public_key = google_jwks.get_key(unverified_header.get('kid'))
 
-        if not key:
+        if not public_key:
             return None
 
-        # Convert key to PEM format
-        public_key = pyjwt.algorithms.RSAAlgorithm.from_jwk(key)
-
         # Verify and decode token
         payload = pyjwt.decode(
             token,
@@ -0,0 +1,149 @@
+import sqlalchemy as sa
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+from sqlalchemy.schema import CreateColumn, CreateTable
+
+# Named database settings. 'pragmas' apply to SQLite connections, 'pool' to server
+# databases (Postgres), 'sqlite_connect_args' to the SQLite driver and 'engine' to both.
+DB_PROFILES = {
+    # What create_app used to do: WAL and driver defaults
+    'legacy': {
+        'pragmas': {'journal_mode': 'WAL'},
+        'pool': {},
+        'engine': {},
+    },
+    # Engine and API workers writing concurrently: fsync only at checkpoints (WAL stays
+    # consistent, the last commits may be lost on power failure), wait for locks instead of
+    # failing fast, bigger page cache and reads through mmap
+    'balanced': {
+        'pragmas': {'journal_mode': 'WAL', 'synchronous': 'NORMAL', 'busy_timeout': 15000,
+                    'cache_size': -65536, 'mmap_size': 268435456, 'temp_store': 'MEMORY'},
+        'pool': {'pool_size': 10, 'max_overflow': 20, 'pool_timeout': 30, 'pool_pre_ping': True,
+                 'pool_recycle': 1800},
+        'engine': {'query_cache_size': 1200},
+        'sqlite_connect_args': {'cached_statements': 256},
+    },
+}
+# As balanced, but every commit is fsynced
+DB_PROFILES['durable'] = dict(DB_PROFILES['balanced'],
+                              pragmas=dict(DB_PROFILES['balanced']['pragmas'], synchronous='FULL'))
+
+# Databases with INSERT ... ON CONFLICT, which the tag, ticker sync and summary upserts rely on
+SUPPORTED_BACKENDS = ('sqlite', 'postgresql')
+
+
+def configure_database(app):
+    """Fill SQLALCHEMY_ENGINE_OPTIONS from the DB_PROFILE, before db.init_app.
+
+    Options already in SQLALCHEMY_ENGINE_OPTIONS win over the profile, as do pragmas in
+    SQLITE_PRAGMAS. Returns the pragmas to set on each new SQLite connection. Databases
+    other than SUPPORTED_BACKENDS fail here, at startup, rather than on the first upsert.
+    """
+    name = app.config['DB_PROFILE']
+    if name not in DB_PROFILES:
+        raise ValueError(f"Unknown DB_PROFILE {name!r}, expected one of {', '.join(DB_PROFILES)}")
+    profile = DB_PROFILES[name]
+    backend = make_url(app.config['SQLALCHEMY_DATABASE_URI']).get_backend_name()
+    if backend not in SUPPORTED_BACKENDS:
+        raise ValueError(f"Unsupported database {backend!r} in SQLALCHEMY_DATABASE_URI, "
+                         f"expected one of {', '.join(SUPPORTED_BACKENDS)}")
+    sqlite = backend == 'sqlite'
+
+    options = dict(profile['engine'])
+    if sqlite:
+        connect_args = dict(profile.get('sqlite_connect_args', {}))
+        if 'busy_timeout' in profile['pragmas']:
+            # The driver's own busy timeout (default 5s) would otherwise apply on top
+            connect_args['timeout'] = profile['pragmas']['busy_timeout'] / 1000
+        if connect_args:
+            options['connect_args'] = connect_args
+    else:
+        options.update(profile['pool'])
+    options.update(app.config.get('SQLALCHEMY_ENGINE_OPTIONS') or {})
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = options
+
+    return dict(profile['pragmas'], **(app.config.get('SQLITE_PRAGMAS') or {})) if sqlite else {}
+
+
+def set_pragmas(engine, pragmas):
+    """Run PRAGMA statements on every new connection of engine"""
+    if not pragmas:
+        return
+
+    @event.listens_for(engine, "connect")
+    def apply_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f"PRAGMA {name}={value};")
+        cursor.close()
+
+
+def upgrade_schema(db, progress=print):
+    """Bring an existing database up to the models, returning the names of the tables changed.
+
+    create_all only creates missing tables. Columns missing from existing tables are added
+    with ALTER TABLE where the database can; SQLite can't add stored generated columns or
+    non-constant defaults, so there the table is created afresh under a temporary name,
+    the rows are copied across and it is renamed into place. Missing indexes and tables are
+    created last. Back the database up first.
+    """
+    changed = []
+    with db.engine.connect() as connection:
+        sqlite = connection.dialect.name == 'sqlite'
+        if sqlite:
+            # Dropping a rebuilt table must not cascade to, or trip over, the rows pointing at it
+            foreign_keys = connection.exec_driver_sql('PRAGMA foreign_keys').scalar()
+            connection.exec_driver_sql('PRAGMA foreign_keys=OFF')
+        inspector = sa.inspect(connection)
+        existing = set(inspector.get_table_names())
+        for table in db.metadata.sorted_tables:
+            if table.name not in existing:
+                changed.append(table.name)
+                if progress:
+                    progress(f"{table.name}: created")
+                continue
+            present = {column['name'] for column in inspector.get_columns(table.name)}
+            missing = [column for column in table.columns if column.name not in present]
+            if missing and sqlite:
+                rebuild_table(connection, db.metadata, table, present)
+                indexes = set()
+            else:
+                for column in missing:
+                    connection.exec_driver_sql(f'ALTER TABLE "{table.name}" ADD COLUMN '
+                                               f'{CreateColumn(column).compile(dialect=connection.dialect)}')
+                indexes = index_names(connection, table.name)
+            added = [index for index in table.indexes if index.name not in indexes]
+            for index in added:
+                index.create(connection)
+            if missing or added:
+                changed.append(table.name)
+                if progress:
+                    progress(f"{table.name}: added {', '.join(column.name for column in missing) or 'indexes'}")
+        db.metadata.create_all(connection)
+        connection.commit()
+        if sqlite:
+            connection.exec_driver_sql(f'PRAGMA foreign_keys={foreign_keys}')
+    return changed
+
+
+def index_names(connection, table_name):
+    if connection.dialect.name == 'sqlite':
+        # The inspector skips expression indexes on SQLite
+        return set(connection.exec_driver_sql(
+            "SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = ?", (table_name,)).scalars())
+    return {index['name'] for index in sa.inspect(connection).get_indexes(table_name)}
+
+
+def rebuild_table(connection, metadata, table, present):
+    """Recreate table from its definition, keeping the rows of the present columns"""
+    scratch = sa.MetaData()
+    for other in metadata.sorted_tables:
+        other.to_metadata(scratch)
+    temporary = table.to_metadata(scratch, name=f'_{table.name}_upgrade')
+    connection.execute(CreateTable(temporary))
+    # Generated columns are computed by the database as the rows go in
+    columns = ', '.join(f'"{column.name}"' for column in table.columns
+                        if column.name in present and column.computed is None)
+    connection.exec_driver_sql(f'INSERT INTO "{temporary.name}" ({columns}) SELECT {columns} FROM "{table.name}"')
+    connection.exec_driver_sql(f'DROP TABLE "{table.name}"')
+    connection.exec_driver_sql(f'ALTER TABLE "{temporary.name}" RENAME TO "{table.name}"')
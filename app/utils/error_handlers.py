@@ -2,6 +2,7 @@ from flask import jsonify
 from sqlalchemy.exc import IntegrityError
 from marshmallow import ValidationError
 from werkzeug.exceptions import NotFound, BadRequest, Unauthorized, Forbidden, MethodNotAllowed
+from app.utils.passwords import PasswordHasherBusy
 
 
 def register_error_handlers(app):
@@ -33,6 +34,10 @@ def register_error_handlers(app):
     def handle_internal_error(e):
         return jsonify({'error': 'Internal server error'}), 500
 
+    @app.errorhandler(PasswordHasherBusy)
+    def handle_password_hasher_busy(e):
+        return jsonify({'error': 'Server busy, please retry'}), 503, {'Retry-After': '1'}
+
     @app.errorhandler(MethodNotAllowed)
     def handle_method_not_allowed(e):
         return jsonify({'error': 'Method not allowed'}), 405
\ No newline at end of file
@@ -0,0 +1,37 @@
+import hashlib
+from functools import wraps
+from flask import request, make_response
+
+
+def make_etag(*parts):
+    """Hash the given version parts into a strong ETag value"""
+    return hashlib.sha1(repr(parts).encode()).hexdigest()
+
+
+def conditional(compute_etag):
+    """Answer If-None-Match with 304 before the view runs.
+
+    compute_etag receives the view arguments and must return an ETag (or None to skip)
+    from cheap version columns, without loading or serializing the resource itself.
+    """
+    def decorator(f):
+        @wraps(f)
+        def decorated(*args, **kwargs):
+            etag = compute_etag(*args, **kwargs)
+            if etag is None:
+                return f(*args, **kwargs)
+
+            if request.if_none_match.contains(etag):
+                response = make_response('', 304)
+            else:
+                response = make_response(f(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+
+            response.set_etag(etag)
+            response.headers['Cache-Control'] = 'private, no-cache'
+            return response
+
+        return decorated
+
+    return decorator
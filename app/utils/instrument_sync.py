@@ -0,0 +1,121 @@
+import uuid
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+import pandas as pd
+import sqlalchemy as sa
+from app import db
+from app.models import Ticker
+from app.models.base import dialect_insert
+
+METADATA_COLUMNS = ['symbol', 'name', 'exchange']
+
+
+@dataclass
+class SyncResult:
+    """Instrument tokens touched by a sync, by kind of change"""
+    inserted: list = field(default_factory=list)
+    updated: list = field(default_factory=list)
+    deactivated: list = field(default_factory=list)
+
+    @property
+    def changed(self):
+        return self.inserted + self.updated + self.deactivated
+
+    def __str__(self):
+        return f"{len(self.inserted)} inserted, {len(self.updated)} updated, {len(self.deactivated)} deactivated"
+
+
+def load_universe(path):
+    """Symbols we track, with company names, from an NSE equity list such as stocks.csv"""
+    df = pd.read_csv(path, usecols=['SYMBOL', 'NAME OF COMPANY'], dtype=str)
+    return df.rename(columns={'SYMBOL': 'symbol', 'NAME OF COMPANY': 'company'}).drop_duplicates('symbol')
+
+
+def desired_tickers(instruments, universe, exchange):
+    """Join the instrument dump to the universe on symbol, one row per instrument_token"""
+    df = pd.DataFrame(instruments, columns=['instrument_token', 'tradingsymbol', 'name', 'exchange'])
+    df = df[df['exchange'] == exchange].rename(columns={'tradingsymbol': 'symbol'})
+    df = df.merge(universe, on='symbol', how='inner')
+    # Kite leaves name empty for some instruments, the exchange's company name is a better label than nothing
+    df['name'] = df['name'].where(df['name'].fillna('').str.strip() != '', df['company'])
+    df['instrument_token'] = df['instrument_token'].astype('int64')
+    return df.drop(columns='company').drop_duplicates('instrument_token').drop_duplicates('symbol')
+
+
+def existing_tickers(exchange):
+    rows = db.session.execute(sa.select(Ticker.id, Ticker.instrument_token, Ticker.symbol, Ticker.name,
+                                        Ticker.exchange, Ticker.is_active).where(Ticker.exchange == exchange)).all()
+    df = pd.DataFrame(rows, columns=['id', 'instrument_token', 'symbol', 'name', 'exchange', 'is_active'])
+    df['instrument_token'] = df['instrument_token'].astype('int64')
+    return df
+
+
+def sync_instruments(instruments, universe, exchange='NSE', chunk_size=1000):
+    """Bring the ticker table in line with an instrument dump, without committing.
+
+    Instruments are matched to existing tickers by instrument_token, then by symbol (a
+    relisted symbol gets a new token but keeps its ticker and trades). New instruments
+    are inserted with a chunked upsert and changed ones updated with executemany; tickers
+    that are no longer listed are deactivated. Only changed rows are written, and their
+    synced_at is bumped so the live engine can pick up exactly those tokens. Safe to re-run.
+    """
+    now = datetime.now(timezone.utc)
+    desired = desired_tickers(instruments, universe, exchange)
+    existing = existing_tickers(exchange)
+
+    merged = desired.merge(existing, on='instrument_token', how='outer', suffixes=('', '_old'), indicator=True)
+    new = merged[merged['_merge'] == 'left_only'][['instrument_token'] + METADATA_COLUMNS]
+    gone = merged[merged['_merge'] == 'right_only'][['id', 'instrument_token', 'symbol_old', 'is_active']]
+
+    # Same symbol under a new token: move the existing ticker over instead of inserting a duplicate symbol
+    moved = new.merge(gone[['id', 'symbol_old']], left_on='symbol', right_on='symbol_old', how='inner')
+    new = new[~new['symbol'].isin(moved['symbol'])]
+    gone = gone[~gone['id'].isin(moved['id'])]
+
+    matched = merged[merged['_merge'] == 'both']
+    differs = ~matched['is_active'].astype(bool)
+    for column in METADATA_COLUMNS:
+        differs |= matched[column] != matched[f'{column}_old']
+    changed = matched[differs]
+
+    updated = pd.concat([changed, moved])
+    deactivate = gone[gone['is_active'].astype(bool)]
+
+    # Deactivations first so a symbol released by one ticker can be taken by another in the same sync
+    if len(deactivate):
+        db.session.execute(sa.update(Ticker).where(Ticker.id.in_(deactivate['id'].tolist()))
+                           .values(is_active=False, synced_at=now))
+
+    table = Ticker.__table__
+    updates = [
+        {'ticker_id': row.id, 'instrument_token': int(row.instrument_token), 'symbol': row.symbol,
+         'name': row.name, 'exchange': row.exchange, 'is_active': True, 'synced_at': now}
+        for row in updated.itertuples(index=False)
+    ]
+    for start in range(0, len(updates), chunk_size):
+        db.session.execute(sa.update(table).where(table.c.id == sa.bindparam('ticker_id')),
+                           updates[start:start + chunk_size])
+
+    inserts = [
+        {'id': str(uuid.uuid4()), 'instrument_token': int(row.instrument_token), 'symbol': row.symbol,
+         'name': row.name, 'exchange': row.exchange, 'is_active': True, 'synced_at': now, 'created_at': now}
+        for row in new.itertuples(index=False)
+    ]
+    for start in range(0, len(inserts), chunk_size):
+        # Upsert on the token, so two overlapping runs can't trip over each other's inserts
+        stmt = dialect_insert(table)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[table.c.instrument_token],
+            set_={column: stmt.excluded[column] for column in METADATA_COLUMNS + ['is_active', 'synced_at']})
+        db.session.execute(stmt, inserts[start:start + chunk_size])
+
+    # Search documents for the touched tickers only, sent when the caller commits
+    fields = METADATA_COLUMNS + ['is_active']
+    documents = {row['id']: {column: row[column] for column in fields} for row in inserts}
+    documents.update({row['ticker_id']: {column: row[column] for column in fields} for row in updates})
+    documents.update({ticker_id: None for ticker_id in deactivate['id']})
+    Ticker.track_documents(documents)
+
+    return SyncResult(inserted=[row['instrument_token'] for row in inserts],
+                      updated=[row['instrument_token'] for row in updates],
+                      deactivated=deactivate['instrument_token'].astype(int).tolist())
@@ -0,0 +1,81 @@
+import re
+import threading
+import time
+import logging
+import requests
+import jwt as pyjwt
+
+logger = logging.getLogger(__name__)
+
+MAX_AGE_RE = re.compile(r'max-age=(\d+)')
+
+
+class JWKSCache:
+    """Process-wide cache of a JWKS endpoint's public keys.
+
+    Keys are converted from JWK once per fetch. The key set is refetched when the
+    Cache-Control max-age runs out or a token names an unknown kid (at most once per
+    min_refresh_interval), and only one thread fetches at a time while the others wait
+    for its result. If a refresh fails the previous keys keep being served.
+    """
+
+    def __init__(self, url, default_max_age=3600, min_refresh_interval=60, timeout=5):
+        self.url = url
+        self.default_max_age = default_max_age
+        self.min_refresh_interval = min_refresh_interval
+        self.timeout = timeout
+        self.session = requests.Session()
+        self._keys = {}
+        self._expires_at = 0.0
+        self._fetched_at = None
+        self._lock = threading.Lock()
+
+    def configure(self, url):
+        with self._lock:
+            if url != self.url:
+                self.url = url
+                self._keys = {}
+                self._expires_at = 0.0
+                self._fetched_at = None
+
+    def get_key(self, kid):
+        """Public key for kid, or None if the endpoint doesn't know it"""
+        now = time.monotonic()
+        key = self._keys.get(kid)
+        if key is not None and now < self._expires_at:
+            return key
+
+        with self._lock:
+            # Another thread may have refreshed while we waited for the lock
+            now = time.monotonic()
+            key = self._keys.get(kid)
+            if key is not None and now < self._expires_at:
+                return key
+
+            expired = now >= self._expires_at
+            unknown_kid_allowed = self._fetched_at is None or now - self._fetched_at >= self.min_refresh_interval
+            if expired or unknown_kid_allowed:
+                self._refresh(now)
+            return self._keys.get(kid)
+
+    def _refresh(self, now):
+        self._fetched_at = now
+        try:
+            response = self.session.get(self.url, timeout=self.timeout)
+            response.raise_for_status()
+            keys = {}
+            for jwk in response.json().get('keys', []):
+                try:
+                    keys[jwk['kid']] = pyjwt.algorithms.RSAAlgorithm.from_jwk(jwk)
+                except Exception as e:
+                    logger.warning(f"Skipping unusable JWK {jwk.get('kid')}: {e}")
+        except Exception as e:
+            logger.error(f"Failed to fetch JWKS from {self.url}: {e}")
+            # Serve the previous keys for a short while before trying again
+            self._expires_at = now + self.min_refresh_interval
+            return
+
+        match = MAX_AGE_RE.search(response.headers.get('Cache-Control', ''))
+        max_age = int(match.group(1)) if match else self.default_max_age
+        self._keys = keys
+        self._expires_at = now + max_age
@@ -0,0 +1,92 @@
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, TimeoutError
+from werkzeug.security import generate_password_hash, check_password_hash
+
+
+class PasswordHasherBusy(Exception):
+    """Raised when too many hashes are already queued or one timed out, callers should answer 503"""
+
+
+class PasswordHasher:
+    """Runs password hashing and verification on a bounded process pool.
+
+    Hashing is CPU-bound, so it runs in worker processes instead of tying up request
+    threads. At most workers + max_pending operations are accepted at once (counting ones
+    whose caller timed out but are still running); beyond that PasswordHasherBusy is raised
+    immediately instead of queueing. With workers=0 hashing runs inline.
+    """
+
+    def __init__(self, method='scrypt', workers=0, max_pending=0, timeout=10):
+        self.method = method
+        self.workers = workers
+        self.max_pending = max_pending
+        self.timeout = timeout
+        self._prefix = None
+        self._executor = None
+        self._slots = None
+        self._lock = threading.Lock()
+
+    def configure(self, method, workers, max_pending, timeout=10):
+        self.shutdown()
+        with self._lock:
+            self.method = method
+            self.workers = workers
+            self.max_pending = max_pending
+            self.timeout = timeout
+            self._prefix = None
+            self._slots = threading.BoundedSemaphore(workers + max_pending) if workers else None
+
+    def _get_executor(self):
+        # Created on first use so every (forked) web worker gets its own pool. Workers come
+        # from a forkserver (spawn where there is none) rather than forking this process,
+        # which would copy its threads' held locks and open database/search connections.
+        # The forkserver imports __main__ once, so entry points that do work at import time
+        # should keep it under `if __name__ == '__main__'`.
+        with self._lock:
+            if self._executor is None:
+                methods = multiprocessing.get_all_start_methods()
+                context = multiprocessing.get_context('forkserver' if 'forkserver' in methods else 'spawn')
+                self._executor = ProcessPoolExecutor(max_workers=self.workers, mp_context=context)
+            return self._executor
+
+    def _run(self, fn, *args):
+        if not self.workers:
+            return fn(*args)
+
+        slots = self._slots
+        if not slots.acquire(blocking=False):
+            raise PasswordHasherBusy()
+        try:
+            future = self._get_executor().submit(fn, *args)
+        except BaseException:
+            slots.release()
+            raise
+        # The slot is held until the worker is done, even if the caller stops waiting
+        future.add_done_callback(lambda _: slots.release())
+        try:
+            return future.result(timeout=self.timeout)
+        except TimeoutError:
+            raise PasswordHasherBusy()
+
+    def hash(self, password):
+        return self._run(generate_password_hash, password, self.method)
+
+    def verify(self, password_hash, password):
+        return self._run(check_password_hash, password_hash, password)
+
+    def needs_rehash(self, password_hash):
+        """True if password_hash was made with different parameters than the configured method"""
+        if self._prefix is None:
+            # Expand defaults, e.g. 'scrypt' -> 'scrypt:32768:8:1'
+            self._prefix = generate_password_hash('', self.method).split('$', 1)[0]
+        return password_hash.split('$', 1)[0] != self._prefix
+
+    def shutdown(self):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=True, cancel_futures=True)
+                self._executor = None
+
+
+password_hasher = PasswordHasher()
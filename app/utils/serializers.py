@@ -0,0 +1,124 @@
+import re
+import json
+import operator
+from flask import current_app
+from marshmallow import fields
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def _str(value):
+    if value is None or type(value) is str:
+        return value
+    return str(value)
+
+
+def _float(value):
+    return None if value is None else float(value)
+
+
+def _int(value):
+    return None if value is None else int(value)
+
+
+def _bool(value):
+    if value is None:
+        return None
+    if value in fields.Boolean.truthy:
+        return True
+    if value in fields.Boolean.falsy:
+        return False
+    return bool(value)
+
+
+def _datetime(value):
+    return None if value is None else value.isoformat()
+
+
+def _converter(field):
+    """Return a plain function that serializes a value the way the marshmallow field would"""
+    if isinstance(field, fields.Nested):
+        dump = compile_serializer(field.schema)
+        if field.many:
+            return lambda value: None if value is None else [dump(item) for item in value]
+        return lambda value: None if value is None else dump(value)
+
+    if isinstance(field, fields.List) and isinstance(field.inner, fields.Nested) and not field.inner.many:
+        dump = compile_serializer(field.inner.schema)
+        return lambda value: None if value is None else [dump(item) for item in value]
+
+    # Order matters: Email/Url subclass String, Float/Integer subclass Number
+    if isinstance(field, fields.DateTime) and (field.format or 'iso') in ('iso', 'iso8601'):
+        return _datetime
+    if isinstance(field, fields.String):
+        return _str
+    if isinstance(field, fields.Float) and not field.as_string:
+        return _float
+    if isinstance(field, fields.Integer) and not field.as_string:
+        return _int
+    if isinstance(field, fields.Boolean):
+        return _bool
+
+    raise TypeError(f"No fast serializer for {type(field).__name__} field")
+
+
+def compile_serializer(schema):
+    """Build a dump function equivalent to schema.dump for a single object.
+
+    Field accessors and converters are resolved once here, so dumping an object is a
+    single dict comprehension with no marshmallow field machinery involved.
+    """
+    accessors = tuple(
+        (field.data_key or name, operator.attrgetter(field.attribute or name), _converter(field))
+        for name, field in schema.dump_fields.items()
+    )
+
+    def dump(obj):
+        return {key: convert(get(obj)) for key, get, convert in accessors}
+
+    return dump
+
+
+# What json.dumps(ensure_ascii=True) escapes beyond orjson: DEL and everything non-ASCII
+NON_ASCII = re.compile('[\x7f-\U0010ffff]')
+
+
+def _escape(match):
+    code = ord(match.group())
+    if code > 0xffff:
+        code -= 0x10000
+        return '\\u{:04x}\\u{:04x}'.format(0xd800 | (code >> 10), 0xdc00 | (code & 0x3ff))
+    return '\\u{:04x}'.format(code)
+
+
+def _ascii(body):
+    """orjson output with \\u escapes, byte for byte what the stdlib encoder writes"""
+    if body.isascii() and b'\x7f' not in body:
+        return body
+    return NON_ASCII.sub(_escape, body.decode()).encode()
+
+
+def dumps(payload):
+    """Encode payload as compact JSON bytes with sorted keys"""
+    if orjson is None:
+        return json.dumps(payload, sort_keys=True, separators=(',', ':')).encode()
+    return _ascii(orjson.dumps(payload, option=orjson.OPT_SORT_KEYS))
+
+
+def json_response(payload, status=200):
+    """jsonify replacement that uses orjson when it is installed.
+
+    Keys are sorted and non-ASCII characters \\u escaped like Flask's default provider,
+    so the body is the same bytes jsonify would send.
+    """
+    if orjson is None:
+        return current_app.json.response(payload), status
+
+    option = orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS | orjson.OPT_APPEND_NEWLINE
+    if current_app.debug:
+        option |= orjson.OPT_INDENT_2
+    return current_app.response_class(_ascii(orjson.dumps(payload, option=option)), status=status,
+                                      mimetype=current_app.json.mimetype)
@@ -0,0 +1,19 @@
+import time
+
+
+class StartupTimer:
+    """Records how long each step of app initialization took"""
+
+    def __init__(self):
+        self.timings = {}
+        self._last = time.perf_counter()
+
+    def mark(self, step):
+        now = time.perf_counter()
+        self.timings[step] = now - self._last
+        self._last = now
+
+    def report(self):
+        total = sum(self.timings.values())
+        steps = ', '.join(f'{step} {seconds * 1000:.1f}ms' for step, seconds in self.timings.items())
+        return f'create_app took {total * 1000:.1f}ms: {steps}'
@@ -0,0 +1,131 @@
+import re
+import time
+import threading
+from bisect import bisect_left
+from collections import defaultdict
+import sqlalchemy as sa
+from app import db
+from app.models import Ticker
+
+WORD = re.compile(r'[A-Z0-9]+')
+GRAM = 3
+
+
+def _prefix_range(keys, prefix):
+    """Slice bounds of the entries in sorted keys that start with prefix"""
+    start = bisect_left(keys, prefix)
+    return start, bisect_left(keys, prefix + '\uffff', start)
+
+
+class TickerIndex:
+    """In-memory autocomplete index over the ticker table.
+
+    Symbols and name words are kept in sorted arrays so a prefix lookup is two bisects,
+    and names have a trigram inverted index for substring matches. Results are ranked:
+    exact symbol, symbol prefix, name word prefix, then name substring; shorter symbols
+    first within a rank.
+
+    The index is built on first use and rebuilt when the ticker table's version (row count,
+    latest created_at and synced_at) changes, checked at most every refresh_interval seconds.
+    Call invalidate() after reloading tickers in-process to rebuild on the next search.
+    """
+
+    def __init__(self, refresh_interval=60):
+        self.refresh_interval = refresh_interval
+        self._lock = threading.Lock()
+        self._version = None
+        self._checked_at = 0.0
+        self._data = ([], [], [], [], [], {})
+
+    def configure(self, refresh_interval):
+        self.refresh_interval = refresh_interval
+        self.invalidate()
+
+    def invalidate(self):
+        with self._lock:
+            self._version = None
+            self._checked_at = 0.0
+
+    def _current_version(self):
+        return tuple(db.session.execute(sa.select(sa.func.count(Ticker.id), sa.func.max(Ticker.created_at),
+                                                  sa.func.max(Ticker.synced_at))).one())
+
+    def _build(self):
+        rows = db.session.execute(sa.select(Ticker.id, Ticker.symbol, Ticker.name).where(Ticker.is_active)).all()
+        rows = sorted(rows, key=lambda row: row.symbol.upper())
+
+        ids = [row.id for row in rows]
+        symbols = [row.symbol.upper() for row in rows]
+        names = [(row.name or '').upper() for row in rows]
+
+        # Positions into ids, so ranking and tie-breaks work on small ints
+        words = sorted((word, position) for position, name in enumerate(names) for word in set(WORD.findall(name)))
+        grams = defaultdict(set)
+        for position, name in enumerate(names):
+            for i in range(len(name) - GRAM + 1):
+                grams[name[i:i + GRAM]].add(position)
+
+        # Swapped in as one tuple so concurrent searches never see a half-built index
+        self._data = (ids, symbols, names, [word for word, _ in words], [position for _, position in words],
+                      {gram: frozenset(positions) for gram, positions in grams.items()})
+
+    def _ensure_fresh(self):
+        now = time.monotonic()
+        if self._version is not None and now - self._checked_at < self.refresh_interval:
+            return
+        with self._lock:
+            if self._version is not None and now - self._checked_at < self.refresh_interval:
+                return
+            version = self._current_version()
+            if version != self._version:
+                self._build()
+                self._version = version
+            self._checked_at = now
+
+    @staticmethod
+    def _name_substring(names, grams, query):
+        if len(query) < GRAM:
+            return [position for position, name in enumerate(names) if query in name]
+
+        candidates = None
+        for i in range(len(query) - GRAM + 1):
+            postings = grams.get(query[i:i + GRAM])
+            if not postings:
+                return []
+            candidates = postings if candidates is None else candidates & postings
+        return [position for position in candidates if query in names[position]]
+
+    def search(self, query):
+        """Ranked ticker ids matching query by symbol prefix or name substring"""
+        query = query.strip().upper()
+        if not query:
+            return []
+        self._ensure_fresh()
+        ids, symbols, names, word_keys, word_ids, grams = self._data
+
+        ranks = {}
+        start, stop = _prefix_range(symbols, query)
+        for position in range(start, stop):
+            ranks[position] = 0 if symbols[position] == query else 1
+        start, stop = _prefix_range(word_keys, query)
+        for position in word_ids[start:stop]:
+            ranks.setdefault(position, 2)
+        for position in self._name_substring(names, grams, query):
+            ranks.setdefault(position, 3)
+
+        # Positions follow symbol order, so they double as the alphabetical tie-break
+        ranked = sorted(ranks, key=lambda position: (ranks[position], len(symbols[position]), position))
+        return [ids[position] for position in ranked]
+
+    def page(self, query, page, per_page):
+        """(tickers, total) for one page of search results, loaded from the database in rank order"""
+        ids = self.search(query)
+        page_ids = ids[(page - 1) * per_page:page * per_page]
+        if not page_ids:
+            return [], len(ids)
+
+        tickers = {ticker.id: ticker for ticker in db.session.scalars(sa.select(Ticker).where(Ticker.id.in_(page_ids)))}
+        return [tickers[ticker_id] for ticker_id in page_ids if ticker_id in tickers], len(ids)
+
+
+ticker_index = TickerIndex()
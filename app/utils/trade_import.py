@@ -0,0 +1,143 @@
+import uuid
+from collections import defaultdict
+from datetime import datetime, timezone
+import numpy as np
+import pandas as pd
+import sqlalchemy as sa
+from app import db
+from app.models import Trade, Ticker, Tag, TradeSide, TradeType, TradeTimeframe, TradeETA
+
+REQUIRED_COLUMNS = ['symbol', 'side', 'entry']
+OPTIONAL_COLUMNS = ['stoploss', 'target', 'tags', 'timeframe', 'notes', 'score']
+SIDES = [TradeSide.BUY, TradeSide.SELL]
+TIMEFRAMES = [TradeTimeframe.MINUTE, TradeTimeframe.FIVE_MINUTES, TradeTimeframe.FIFTEEN_MINUTES,
+              TradeTimeframe.HOUR, TradeTimeframe.DAY, TradeTimeframe.WEEK, TradeTimeframe.MONTH]
+
+# Upper bounds (in % distance from last price) matching Trade.calculate_eta
+ETA_BUCKETS = [(0.1, TradeETA.ONE_MINUTE), (0.2, TradeETA.FIVE_MINUTES), (0.5, TradeETA.FIFTEEN_MINUTES),
+               (1.0, TradeETA.ONE_HOUR), (2.0, TradeETA.ONE_DAY), (5.0, TradeETA.ONE_WEEK),
+               (10.0, TradeETA.ONE_MONTH)]
+
+
+class TradeImportError(ValueError):
+    """The file itself can't be imported (unreadable, missing columns, too many rows)"""
+
+
+def read_trades_csv(file, max_rows):
+    try:
+        df = pd.read_csv(file, dtype=str, keep_default_na=False, skipinitialspace=True)
+    except (pd.errors.ParserError, pd.errors.EmptyDataError, UnicodeDecodeError) as e:
+        raise TradeImportError(f'Could not parse CSV: {e}')
+
+    df.columns = df.columns.str.strip().str.lower()
+    missing = [column for column in REQUIRED_COLUMNS if column not in df.columns]
+    if missing:
+        raise TradeImportError(f'Missing required column(s): {", ".join(missing)}')
+    if len(df) > max_rows:
+        raise TradeImportError(f'At most {max_rows} rows can be imported at once')
+
+    for column in OPTIONAL_COLUMNS:
+        if column not in df.columns:
+            df[column] = ''
+    return df[REQUIRED_COLUMNS + OPTIONAL_COLUMNS].apply(lambda column: column.str.strip())
+
+
+def validate(df, errors):
+    """Normalize df column by column and record per-row errors, returns the typed frame"""
+
+    def flag(mask, column, message):
+        for index in df.index[mask]:
+            errors[index].setdefault(column, []).append(message)
+
+    def number(column, required):
+        empty = df[column] == ''
+        values = pd.to_numeric(df[column], errors='coerce')
+        if required:
+            flag(empty, column, 'Missing data for required field.')
+        flag(values.isna() & ~empty, column, 'Not a valid number.')
+        flag(values < 0, column, 'Must be greater than or equal to 0.')
+        return values
+
+    out = pd.DataFrame(index=df.index)
+
+    out['symbol'] = df['symbol'].str.upper()
+    flag(out['symbol'] == '', 'symbol', 'Missing data for required field.')
+
+    out['side'] = df['side'].str.upper()
+    flag(~out['side'].isin(SIDES), 'side', f'Must be one of: {", ".join(SIDES)}.')
+
+    out['entry'] = number('entry', required=True)
+    out['stoploss'] = number('stoploss', required=False)
+    out['target'] = number('target', required=False)
+
+    out['timeframe'] = df['timeframe'].replace('', TradeTimeframe.DAY)
+    flag(~out['timeframe'].isin(TIMEFRAMES), 'timeframe', f'Must be one of: {", ".join(TIMEFRAMES)}.')
+
+    score = pd.to_numeric(df['score'].replace('', '0'), errors='coerce')
+    flag(score.isna() | (score % 1 != 0), 'score', 'Not a valid integer.')
+    out['score'] = score
+
+    out['notes'] = df['notes']
+    out['tags'] = df['tags'].str.split(';').map(lambda names: list(dict.fromkeys(n.strip() for n in names if n.strip())))
+    return out
+
+
+def resolve_tickers(out, errors):
+    """Join symbols to Ticker ids and last prices with a single IN query"""
+    symbols = out['symbol'].unique().tolist()
+    tickers = pd.DataFrame(
+        db.session.execute(sa.select(Ticker.symbol, Ticker.id, Ticker.last_price)
+                           .where(Ticker.symbol.in_(symbols))).all(),
+        columns=['symbol', 'ticker_id', 'last_price'])
+    out = out.join(tickers.set_index('symbol'), on='symbol')
+
+    for index in out.index[out['ticker_id'].isna() & (out['symbol'] != '')]:
+        errors[index].setdefault('symbol', []).append('Ticker not found.')
+    return out
+
+
+def derive(out):
+    """Trade type and entry ETA for every row at once, mirrors create_trade and Trade.update_etas"""
+    out['type'] = np.where(out['entry'] >= out['last_price'], TradeType.CROSSING_ABOVE, TradeType.CROSSING_BELOW)
+
+    priced = out['last_price'] > 0
+    distance = ((out['entry'] - out['last_price']) / out['last_price'].where(priced)).abs() * 100
+    conditions = [out['entry'] == 0] + [distance <= bound for bound, _ in ETA_BUCKETS]
+    choices = [TradeETA.FAR] + [eta for _, eta in ETA_BUCKETS]
+    out['entry_eta'] = np.where(priced, np.select(conditions, choices, default=TradeETA.FAR), None)
+    return out
+
+
+def import_trades(file, user_id, max_rows=50_000, chunk_size=1000):
+    """Validate and insert the trades in a CSV file for user_id.
+
+    Rows with errors are skipped and reported as [{'row': <line in file>, 'errors': {...}}];
+    the remaining rows are inserted in chunks within the caller's transaction.
+    Returns (created count, errors). Raises TradeImportError if the file can't be used at all.
+    """
+    df = read_trades_csv(file, max_rows)
+    errors = defaultdict(dict)
+
+    out = validate(df, errors)
+    out = resolve_tickers(out, errors)
+    valid = out.drop(index=list(errors))
+
+    if len(valid):
+        valid = derive(valid)
+        tag_ids = Tag.ensure_names(user_id, {name for names in valid['tags'] for name in names})
+
+        now = datetime.now(timezone.utc)
+        valid = valid.astype(object).where(valid.notna(), None)
+        rows = [
+            {
+                'id': str(uuid.uuid4()), 'user_id': user_id, 'ticker_id': r['ticker_id'], 'symbol': r['symbol'],
+                'side': r['side'], 'type': r['type'], 'entry': r['entry'], 'stoploss': r['stoploss'],
+                'target': r['target'], 'timeframe': r['timeframe'], 'score': int(r['score']), 'notes': r['notes'],
+                'entry_eta': r['entry_eta'], 'updated_at': now, 'tag_ids': [tag_ids[name] for name in r['tags']],
+            }
+            for r in valid.to_dict('records')
+        ]
+        Trade.insert_many(rows, chunk_size=chunk_size)
+
+    report = [{'row': index + 2, 'errors': row_errors} for index, row_errors in sorted(errors.items())]
+    return len(valid), report
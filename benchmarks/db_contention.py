@@ -0,0 +1,155 @@
+"""Throughput and lock waits per DB_PROFILE with the live engine and API workers writing at once.
+
+One engine process writes candle closes the way live/websocket.py does (a price update and
+commit per ticker) while API processes serve a mix of ticker searches, trade lists and trade
+creation against the same SQLite file. Write latency above the uncontended median is time
+spent waiting for the write lock. Run from the repository root: python -m benchmarks.db_contention
+"""
+import multiprocessing
+import os
+import random
+import statistics
+import tempfile
+import time
+
+PROFILES = ('legacy', 'balanced', 'durable')
+API_WORKERS = 4
+DURATION = 5
+TICKERS = 50
+TRADES = 500
+
+
+def make_config(profile, db_path):
+    from config import Config
+    return type('BenchConfig', (Config,), {
+        'SQLALCHEMY_DATABASE_URI': f'sqlite:///{db_path}',
+        'DB_PROFILE': profile,
+        'SEARCH_BACKEND': 'none',
+        'PASSWORD_HASH_WORKERS': 0,
+    })
+
+
+def setup(profile, db_path):
+    """Create and seed the database, returning a token for the API workers"""
+    from app import create_app, db
+    from app.models import User, Ticker, Trade, TradeSide, TradeType
+    from app.utils.auth import create_tokens
+
+    app = create_app(make_config(profile, db_path))
+    with app.app_context():
+        db.create_all()
+        user = User(name='bench', email='bench@example.com')
+        user.set_password('password')
+        tickers = [Ticker(symbol=f'SYM{i}', exchange='NSE', instrument_token=i, name=f'Company {i} Ltd',
+                          last_price=100.0 + i) for i in range(TICKERS)]
+        db.session.add_all([user] + tickers)
+        db.session.flush()
+        db.session.add_all([Trade(user_id=user.id, ticker_id=tickers[i % TICKERS].id, symbol=f'SYM{i % TICKERS}',
+                                  side=TradeSide.BUY, type=TradeType.CROSSING_ABOVE, entry=150.0)
+                            for i in range(TRADES)])
+        db.session.commit()
+        token = create_tokens(user)[0]
+        ticker_ids = [ticker.id for ticker in tickers]
+        db.engine.dispose()
+    return token, ticker_ids
+
+
+def engine_worker(profile, db_path, ticker_ids, deadline, results):
+    """Price updates as in TickerManager.update_ticker_price, plus the active trade lookup"""
+    from datetime import datetime, timezone
+    from app import create_engine_app, db
+    from app.models import Ticker, Trade
+
+    app = create_engine_app(make_config(profile, db_path))
+    writes, errors = [], 0
+    with app.app_context():
+        while time.time() < deadline:
+            ticker_id = random.choice(ticker_ids)
+            start = time.perf_counter()
+            try:
+                ticker = db.session.get(Ticker, ticker_id)
+                ticker.last_price = random.uniform(90, 200)
+                ticker.last_updated = datetime.now(timezone.utc)
+                db.session.commit()
+                Trade.get_active_trades_for_ticker(ticker_id)
+                db.session.commit()
+                writes.append(time.perf_counter() - start)
+            except Exception:
+                db.session.rollback()
+                errors += 1
+    results.put(('engine', writes, [], errors))
+
+
+def api_worker(profile, db_path, token, ticker_ids, deadline, results):
+    from app import create_app
+
+    app = create_app(make_config(profile, db_path))
+    client = app.test_client()
+    headers = {'Authorization': f'Bearer {token}'}
+    writes, reads, errors = [], [], 0
+    while time.time() < deadline:
+        start = time.perf_counter()
+        if random.random() < 0.2:
+            response = client.post('/api/trades/', headers=headers, json={
+                'ticker_id': random.choice(ticker_ids), 'side': 'BUY', 'entry': 150.0})
+            latencies = writes
+        elif random.random() < 0.5:
+            response = client.get(f'/api/tickers/?q=SYM{random.randrange(TICKERS)}', headers=headers)
+            latencies = reads
+        else:
+            response = client.get('/api/trades/?per_page=50', headers=headers)
+            latencies = reads
+        if response.status_code < 400:
+            latencies.append(time.perf_counter() - start)
+        else:
+            errors += 1
+    results.put(('api', writes, reads, errors))
+
+
+def run(profile):
+    db_path = os.path.join(tempfile.mkdtemp(), 'bench.db')
+    token, ticker_ids = setup(profile, db_path)
+
+    context = multiprocessing.get_context('fork')
+    results = context.Queue()
+    deadline = time.time() + DURATION
+    processes = [context.Process(target=engine_worker, args=(profile, db_path, ticker_ids, deadline, results))]
+    processes += [context.Process(target=api_worker, args=(profile, db_path, token, ticker_ids, deadline, results))
+                  for _ in range(API_WORKERS)]
+    for process in processes:
+        process.start()
+    collected = [results.get() for _ in processes]
+    for process in processes:
+        process.join()
+
+    engine = [result for result in collected if result[0] == 'engine']
+    api = [result for result in collected if result[0] == 'api']
+    return {
+        'engine_writes': [latency for _, writes, _, _ in engine for latency in writes],
+        'api_writes': [latency for _, writes, _, _ in api for latency in writes],
+        'api_reads': [latency for _, _, reads, _ in api for latency in reads],
+        'errors': sum(errors for *_, errors in collected),
+    }
+
+
+def percentile(latencies, fraction):
+    return sorted(latencies)[int(len(latencies) * fraction)] * 1000 if latencies else float('nan')
+
+
+def main():
+    print(f"{'profile':>9} {'engine w/s':>11} {'api w/s':>8} {'api r/s':>8} {'write p50':>10} {'write p99':>10} "
+          f"{'lock wait':>10} {'errors':>7}")
+    for profile in PROFILES:
+        result = run(profile)
+        writes = result['engine_writes'] + result['api_writes']
+        # Time writes spent beyond a typical uncontended write, summed over all writers
+        baseline = statistics.median(writes) if writes else 0
+        lock_wait = sum(max(latency - baseline, 0) for latency in writes)
+        print(f"{profile:>9} {len(result['engine_writes']) / DURATION:>11.0f} "
+              f"{len(result['api_writes']) / DURATION:>8.0f} {len(result['api_reads']) / DURATION:>8.0f} "
+              f"{percentile(writes, 0.5):>8.1f}ms {percentile(writes, 0.99):>8.1f}ms {lock_wait:>9.2f}s "
+              f"{result['errors']:>7}")
+
+
+if __name__ == '__main__':
+    main()
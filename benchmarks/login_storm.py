@@ -0,0 +1,81 @@
+"""Read latency while a burst of logins hits a fixed pool of request threads.
+
+The request threads stand in for a sync WSGI server's workers. Run from the repository
+root: python -m benchmarks.login_storm
+"""
+import os
+import statistics
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+REQUEST_THREADS = 16
+LOGINS = 100
+READS = 100
+
+
+def make_app(workers):
+    from config import Config
+    from app import create_app, db
+    from app.models import User
+
+    db_path = os.path.join(tempfile.mkdtemp(), 'bench.db')
+    config = type('BenchConfig', (Config,), {
+        'SQLALCHEMY_DATABASE_URI': f'sqlite:///{db_path}',
+        'PASSWORD_HASH_WORKERS': workers,
+        'PASSWORD_HASH_MAX_PENDING': 2,
+    })
+    app = create_app(config)
+    with app.app_context():
+        db.create_all()
+        user = User(name='bench', email='bench@example.com')
+        user.set_password('password')
+        db.session.add(user)
+        db.session.commit()
+    return app
+
+
+def run(workers):
+    from app.utils.auth import create_tokens
+    from app.models import User
+    from app.utils.passwords import password_hasher
+
+    app = make_app(workers)
+    with app.app_context():
+        token = create_tokens(User.query.first())[0]
+
+    def login():
+        with app.test_client() as client:
+            return client.post('/api/auth/login', json={'email': 'bench@example.com',
+                                                        'password': 'password'}).status_code
+
+    def read(submitted_at):
+        with app.test_client() as client:
+            client.get('/api/auth/me', headers={'Authorization': f'Bearer {token}'})
+        return time.perf_counter() - submitted_at
+
+    with ThreadPoolExecutor(REQUEST_THREADS) as server:
+        logins = [server.submit(login) for _ in range(LOGINS // 2)]
+        reads = []
+        for _ in range(READS):
+            reads.append(server.submit(read, time.perf_counter()))
+            logins.append(server.submit(login))
+        latencies = sorted(f.result() for f in reads)
+        statuses = [f.result() for f in logins]
+
+    password_hasher.shutdown()
+    return latencies, statuses
+
+
+def main():
+    print(f"{'hash workers':>12} {'read p50':>9} {'read p95':>9} {'logins ok':>10} {'logins 503':>11}")
+    for workers in (0, 2):
+        latencies, statuses = run(workers)
+        p50 = statistics.median(latencies)
+        p95 = latencies[int(len(latencies) * 0.95)]
+        print(f"{workers:>12} {p50 * 1000:>7.1f}ms {p95 * 1000:>7.1f}ms {statuses.count(200):>10} "
+              f"{statuses.count(503):>11}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,44 @@
+"""Startup cost of the API app and the engine-only app, each in a fresh interpreter.
+
+Prints the slowest top-level imports (from python -X importtime) and the time spent in
+each create_app step. Run from the repository root: python -m benchmarks.startup
+"""
+import os
+import subprocess
+import sys
+from collections import defaultdict
+
+PROFILES = {
+    'api': 'from app import create_app; create_app()',
+    'engine': 'from app import create_engine_app; create_engine_app()',
+}
+TOP_IMPORTS = 10
+
+
+def profile(code):
+    env = dict(os.environ, STARTUP_PROFILE='1')
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', code], env=env,
+                            capture_output=True, text=True, check=True)
+
+    # Self time aggregated by top-level package, and the create_app report line
+    packages = defaultdict(int)
+    report = ''
+    for line in result.stderr.splitlines():
+        if line.startswith('import time:') and not line.endswith('package'):
+            self_us, _, name = [part.strip() for part in line[len('import time:'):].split('|')]
+            packages[name.split('.')[0]] += int(self_us)
+        elif 'create_app took' in line:
+            report = line.split('create_app took', 1)[1].strip()
+    return packages, report
+
+
+def main():
+    for name, code in PROFILES.items():
+        packages, report = profile(code)
+        print(f'{name}: imports {sum(packages.values()) / 1000:.0f}ms, create_app {report}')
+        for package, self_us in sorted(packages.items(), key=lambda item: -item[1])[:TOP_IMPORTS]:
+            print(f'  {package:<24} {self_us / 1000:8.1f}ms')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,60 @@
+"""Compare TradeReadSchema.dump against the compiled serializer for large trade lists.
+
+Run from the repository root: python -m benchmarks.trade_serializer
+"""
+import json
+import random
+import time
+from datetime import datetime, timezone, timedelta
+from app.models import Trade, Ticker, Tag, TradeSide, TradeType, TradeStatus, TradeTimeframe
+from app.utils.schemas import TradeReadSchema
+from app.utils.serializers import compile_serializer, orjson
+
+SIZES = (1_000, 10_000, 100_000)
+
+
+def make_trades(n):
+    now = datetime.now(timezone.utc)
+    tickers = [Ticker(id=f'ticker-{i}', symbol=f'SYM{i}', exchange='NSE', instrument_token=i, name=f'Company {i}',
+                      last_price=100.0 + i, last_updated=now) for i in range(50)]
+    tags = [Tag(id=f'tag-{i}', name=f'tag{i}') for i in range(10)]
+    trades = []
+    for i in range(n):
+        side = random.choice([TradeSide.BUY, TradeSide.SELL])
+        trade = Trade(id=f'trade-{i}', symbol=f'SYM{i % 50}', side=side, type=TradeType.CROSSING_ABOVE,
+                      status=TradeStatus.ACTIVE, notes='', entry=120.5, stoploss=110.0 if i % 3 else None,
+                      target=150.25, timeframe=TradeTimeframe.DAY, score=i % 10, entry_x=now, stoploss_x=now,
+                      target_x=now, created_at=now - timedelta(seconds=i), updated_at=now, edited_at=None)
+        trade.ticker = tickers[i % 50]
+        trade.tags = tags[:i % 4]
+        trades.append(trade)
+    return trades
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - start
+
+
+def main():
+    schema = TradeReadSchema(many=True)
+    dump_trade = compile_serializer(TradeReadSchema())
+    encode = (lambda obj: orjson.dumps(obj, option=orjson.OPT_SORT_KEYS)) if orjson else \
+        (lambda obj: json.dumps(obj, sort_keys=True, separators=(',', ':')).encode())
+
+    print(f"{'trades':>8} {'schema dump':>12} {'fast dump':>10} {'schema+json':>12} {'fast+encode':>12} {'speedup':>8}")
+    for n in SIZES:
+        trades = make_trades(n)
+        expected, schema_time = timed(lambda: schema.dump(trades))
+        actual, fast_time = timed(lambda: [dump_trade(t) for t in trades])
+        assert actual == expected, 'compiled serializer output differs from TradeReadSchema'
+
+        _, schema_json_time = timed(lambda: json.dumps(schema.dump(trades), sort_keys=True, separators=(',', ':')))
+        _, fast_json_time = timed(lambda: encode([dump_trade(t) for t in trades]))
+        print(f"{n:>8} {schema_time:>11.3f}s {fast_time:>9.3f}s {schema_json_time:>11.3f}s {fast_json_time:>11.3f}s "
+              f"{schema_json_time / fast_json_time:>7.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -10,11 +10,41 @@ class Config:
     SECRET_KEY = os.environ.get('SECRET_KEY') or 'dev-secret-key'
     SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL') or 'sqlite:///trading_app.db'
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+    # Database settings profile from app/utils/database.py: 'balanced', 'durable' or 'legacy'.
+    # SQLALCHEMY_ENGINE_OPTIONS and SQLITE_PRAGMAS entries override the profile's.
+    DB_PROFILE = os.environ.get('DB_PROFILE') or 'balanced'
+    SQLALCHEMY_ENGINE_OPTIONS = {}
+    SQLITE_PRAGMAS = {}
+    # Log how long each create_app step takes
+    STARTUP_PROFILE = os.environ.get('STARTUP_PROFILE', '').lower() in ('1', 'true', 'yes')
     JWT_SECRET_KEY = os.environ.get('JWT_SECRET_KEY') or 'jwt-secret-string'
     JWT_ACCESS_TOKEN_EXPIRES = timedelta(hours=24)
     JWT_REFRESH_TOKEN_EXPIRES = timedelta(days=999)
     ELASTICSEARCH_URL = os.environ.get('ELASTICSEARCH_URL')
+    # 'elasticsearch', 'database' (SQLite FTS5 / Postgres pg_trgm, serves ticker and tag search;
+    # build its indexes with reindex.py) or 'none' (in-process ticker index and tag cache)
+    SEARCH_BACKEND = os.environ.get('SEARCH_BACKEND') or ('elasticsearch' if ELASTICSEARCH_URL else 'none')
+    SEARCH_INDEX_BATCH_SIZE = int(os.environ.get('SEARCH_INDEX_BATCH_SIZE', 500))
+    SEARCH_INDEX_MAX_RETRIES = int(os.environ.get('SEARCH_INDEX_MAX_RETRIES', 5))
+
+    # Process-local cache of authenticated users (entries, seconds)
+    USER_CACHE_SIZE = int(os.environ.get('USER_CACHE_SIZE', 1024))
+    USER_CACHE_TTL = int(os.environ.get('USER_CACHE_TTL', 30))
+
+    # Process-local cache of each user's tag list for autocomplete (users, seconds)
+    TAG_CACHE_SIZE = int(os.environ.get('TAG_CACHE_SIZE', 1024))
+    TAG_CACHE_TTL = int(os.environ.get('TAG_CACHE_TTL', 300))
+
+    # Seconds between checks for reloaded tickers by the in-memory ticker search index
+    TICKER_INDEX_REFRESH_INTERVAL = int(os.environ.get('TICKER_INDEX_REFRESH_INTERVAL', 60))
+
+    # Password hashing: werkzeug method string (e.g. scrypt:32768:8:1, pbkdf2:sha256:600000),
+    # worker processes (0 hashes inline) and how many more requests may queue before failing fast
+    PASSWORD_HASH_METHOD = os.environ.get('PASSWORD_HASH_METHOD') or 'scrypt:32768:8:1'
+    PASSWORD_HASH_WORKERS = int(os.environ.get('PASSWORD_HASH_WORKERS', 2))
+    PASSWORD_HASH_MAX_PENDING = int(os.environ.get('PASSWORD_HASH_MAX_PENDING', 16))
 
     # Google OAuth
     GOOGLE_CLIENT_ID = os.environ.get('GOOGLE_CLIENT_ID')
-    GOOGLE_CLIENT_SECRET = os.environ.get('GOOGLE_CLIENT_SECRET')
\ No newline at end of file
+    GOOGLE_CLIENT_SECRET = os.environ.get('GOOGLE_CLIENT_SECRET')
+    GOOGLE_JWKS_URL = os.environ.get('GOOGLE_JWKS_URL') or 'https://www.googleapis.com/oauth2/v3/certs'
\ No newline at end of file
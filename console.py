@@ -6,4 +6,7 @@ app = create_app()
 app.app_context().push()
 
 users = User.query.all()
-admins = User.query.where(User.is_admin==True).all()
\ No newline at end of file
+admins = User.query.where(User.is_admin==True).all()
+
+# Streamed in batches through a server-side cursor, for walking large tables once
+iter_users = User.iter_all
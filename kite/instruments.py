@@ -0,0 +1,158 @@
+import os
+import glob
+import tempfile
+import threading
+import logging
+from bisect import bisect_left
+from datetime import datetime, timedelta, timezone
+from os.path import join, dirname
+import numpy as np
+import pytz
+
+logger = logging.getLogger(__name__)
+
+IST = pytz.timezone('Asia/Kolkata')
+
+# Kite publishes the day's instrument dump once, around 08:30 IST
+DUMP_HOUR, DUMP_MINUTE = 8, 30
+
+NUMERIC_FIELDS = [('instrument_token', 'i8'), ('exchange_token', 'i8'), ('last_price', 'f8'),
+                  ('expiry', 'M8[D]'), ('strike', 'f8'), ('tick_size', 'f8'), ('lot_size', 'i8')]
+STRING_FIELDS = ['tradingsymbol', 'name', 'instrument_type', 'segment', 'exchange']
+
+
+def trading_date(now=None):
+    """Date of the latest instrument dump; before the morning dump that's still yesterday's"""
+    now = (now or datetime.now(timezone.utc)).astimezone(IST)
+    published = now.replace(hour=DUMP_HOUR, minute=DUMP_MINUTE, second=0, microsecond=0)
+    return (now if now >= published else now - timedelta(days=1)).date()
+
+
+def to_array(instruments):
+    """Structured array of instrument dicts as returned by KiteConnect.instruments(), sorted by token.
+
+    String columns are sized to their longest value, so the array stays compact.
+    """
+    strings = {field: [str(row.get(field) or '') for row in instruments] for field in STRING_FIELDS}
+    dtype = NUMERIC_FIELDS + [(field, f'U{max(map(len, values), default=0) or 1}') for field, values in strings.items()]
+    array = np.empty(len(instruments), dtype=dtype)
+    for field, _ in NUMERIC_FIELDS:
+        values = [row.get(field) for row in instruments]
+        if field == 'expiry':
+            array[field] = [np.datetime64(value, 'D') if value else np.datetime64('NaT') for value in values]
+        else:
+            array[field] = [value or 0 for value in values]
+    for field, values in strings.items():
+        array[field] = values
+    return np.sort(array, order='instrument_token')
+
+
+class InstrumentMaster:
+    """One exchange's instrument dump, memory-mapped from the cache file.
+
+    Rows are sorted by instrument_token, so token lookups are a binary search on the
+    column view; symbol lookups go through a precomputed symbol order. Nothing is copied
+    out of the file except the rows that are returned.
+    """
+
+    def __init__(self, array, symbol_order):
+        self.array = array
+        self.tokens = array['instrument_token']
+        self.symbols = array['tradingsymbol']
+        self.symbol_order = symbol_order
+
+    def __len__(self):
+        return len(self.array)
+
+    @staticmethod
+    def _record(row):
+        return {field: row[field].item() for field in row.dtype.names}
+
+    def by_token(self, instrument_token):
+        i = int(np.searchsorted(self.tokens, instrument_token))
+        if i < len(self.tokens) and self.tokens[i] == instrument_token:
+            return self._record(self.array[i])
+        return None
+
+    def by_symbol(self, tradingsymbol):
+        i = bisect_left(self.symbol_order, tradingsymbol, key=lambda position: self.symbols[position])
+        if i < len(self.symbol_order) and self.symbols[self.symbol_order[i]] == tradingsymbol:
+            return self._record(self.array[self.symbol_order[i]])
+        return None
+
+    def has_tokens(self, instrument_tokens):
+        """Boolean mask of which of instrument_tokens are listed"""
+        tokens = np.asarray(instrument_tokens, dtype='i8')
+        if not len(self.tokens):
+            return np.zeros(len(tokens), dtype=bool)
+        positions = np.minimum(np.searchsorted(self.tokens, tokens), len(self.tokens) - 1)
+        return self.tokens[positions] == tokens
+
+    def frame(self, columns=None):
+        """pandas DataFrame of the dump (a copy), e.g. for sync_instruments"""
+        import pandas as pd
+        return pd.DataFrame(self.array[columns] if columns else self.array)
+
+
+class InstrumentCache:
+    """Instrument dumps on disk as .npy files, one per exchange and trading date.
+
+    load() maps today's file if there is one and only calls fetch (which should return
+    KiteConnect.instruments(exchange)) when it's missing, i.e. once per exchange per day.
+    Files are written to a temporary name and renamed into place, and older dates are
+    removed once a new dump is stored.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        self._loaded = {}
+        self._lock = threading.Lock()
+
+    def path(self, exchange, date):
+        return join(self.directory, f'{exchange}-{date.isoformat()}.npy')
+
+    def _symbols_path(self, path):
+        return path[:-len('.npy')] + '.symbols.npy'
+
+    def _write(self, path, array):
+        os.makedirs(self.directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, prefix='.instruments-', suffix='.npy')
+        try:
+            with os.fdopen(fd, 'wb') as file:
+                np.save(file, array, allow_pickle=False)
+                file.flush()
+                os.fsync(file.fileno())
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+    def store(self, exchange, instruments, date=None):
+        date = date or trading_date()
+        path = self.path(exchange, date)
+        array = to_array(instruments)
+        # Symbols file first: a dump file without its symbol order would be unreadable
+        self._write(self._symbols_path(path), np.argsort(array['tradingsymbol'], kind='stable'))
+        self._write(path, array)
+        for old in glob.glob(join(self.directory, f'{exchange}-*.npy')):
+            if not old.startswith(path[:-len('.npy')]):
+                os.unlink(old)
+        logger.info(f"Cached {len(array)} {exchange} instruments for {date}")
+        return path
+
+    def load(self, exchange, fetch, date=None):
+        """InstrumentMaster for exchange on date (default: today's trading date)"""
+        date = date or trading_date()
+        path = self.path(exchange, date)
+        with self._lock:
+            cached = self._loaded.get(exchange)
+            if cached and cached[0] == path:
+                return cached[1]
+            if not os.path.exists(path):
+                self.store(exchange, fetch(), date)
+            master = InstrumentMaster(np.load(path, mmap_mode='r'), np.load(self._symbols_path(path), mmap_mode='r'))
+            self._loaded[exchange] = (path, master)
+            return master
+
+
+instrument_cache = InstrumentCache(os.environ.get('KITE_INSTRUMENT_CACHE') or join(dirname(__file__), 'cache'))
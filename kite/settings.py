@@ -0,0 +1,70 @@
+import os
+import json
+import shutil
+import tempfile
+import threading
+import logging
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SETTINGS = {
+    "api_key": "", "api_secret": "", "redirect_uri": "",
+    "access_token": "", "user_id": "", "password": "",
+    "totp_secret": "", "session": {}
+}
+
+
+class SettingsStore:
+    """kite.json, read once and written back atomically.
+
+    The file is parsed on first access and served from memory afterwards. update() writes
+    all given keys in one go to a temporary file next to the original and renames it into
+    place, so a crash or a concurrent reader never sees a half-written file.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._data = None
+        self._lock = threading.RLock()
+
+    def _load(self):
+        if self._data is None:
+            try:
+                with open(self.path, 'r') as file:
+                    self._data = json.load(file)
+            except (IOError, json.JSONDecodeError):
+                self._data = dict(DEFAULT_SETTINGS)
+        return self._data
+
+    def get(self, key, default=None):
+        with self._lock:
+            return self._load().get(key, default)
+
+    def update(self, values=None, **kwargs):
+        """Set several keys and persist them with a single write"""
+        with self._lock:
+            data = dict(self._load())
+            data.update(values or {}, **kwargs)
+            self._write(data)
+            self._data = data
+
+    def reload(self):
+        with self._lock:
+            self._data = None
+            return self._load()
+
+    def _write(self, data):
+        directory = os.path.dirname(os.path.abspath(self.path))
+        fd, temp_path = tempfile.mkstemp(dir=directory, prefix='.kite-', suffix='.json')
+        try:
+            with os.fdopen(fd, 'w') as file:
+                json.dump(data, file, indent=2)
+                file.flush()
+                os.fsync(file.fileno())
+            # Keep the original file's permissions, mkstemp creates files readable by the owner only
+            if os.path.exists(self.path):
+                shutil.copymode(self.path, temp_path)
+            os.replace(temp_path, self.path)
+        except BaseException:
+            os.unlink(temp_path)
+            raise
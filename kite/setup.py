@@ -1,41 +1,97 @@
 import requests
 import pyotp
-import json
+from datetime import datetime, timedelta, timezone
 from os.path import join, dirname
 from urllib.parse import urlparse, parse_qs
 from kiteconnect.connect import KiteConnect
 from kiteconnect.exceptions import TokenException
 import logging
+import pytz
+from .settings import SettingsStore
 
 logger = logging.getLogger(__name__)
 
+IST = pytz.timezone('Asia/Kolkata')
+
+# Kite invalidates every access token daily at 06:00 IST
+TOKEN_RESET_HOUR = 6
+
+
+def last_token_reset(now=None):
+    now = (now or datetime.now(timezone.utc)).astimezone(IST)
+    reset = now.replace(hour=TOKEN_RESET_HOUR, minute=0, second=0, microsecond=0)
+    return reset if now >= reset else reset - timedelta(days=1)
+
 
 class Kite:
     default_setup_file = join(dirname(__file__), 'kite.json')
+    default_login_root = 'https://kite.zerodha.com'
+
+    def __init__(self, init_file=default_setup_file, login_root=default_login_root, api_root=None):
+        """Load credentials and restore the stored session.
 
-    def __init__(self, init_file=default_setup_file):
+        A stored access token issued after the last daily reset is trusted without a
+        network call. login_root and api_root point the login flow and the REST client
+        elsewhere (e.g. a local stub). All HTTP goes through one pooled session.
+        """
         self.init_file = init_file
+        self.settings = SettingsStore(init_file)
+        self.login_root = login_root
+        self.api_root = api_root
         self.kite = None
         self.logged_in = False
-        self.api_key = self.read_key_from_settings('api_key')
-        self.api_secret = self.read_key_from_settings('api_secret')
-        self.access_token = self.read_key_from_settings('access_token')
-        self.user_id = self.read_key_from_settings('user_id')
-        self.password = self.read_key_from_settings('password')
-        self.totp_secret = self.read_key_from_settings('totp_secret')
+        self.api_key = self.settings.get('api_key')
+        self.api_secret = self.settings.get('api_secret')
+        self.access_token = self.settings.get('access_token')
+        self.user_id = self.settings.get('user_id')
+        self.password = self.settings.get('password')
+        self.totp_secret = self.settings.get('totp_secret')
+        issued_at = self.settings.get('token_issued_at')
+        self.token_issued_at = datetime.fromisoformat(issued_at) if issued_at else None
+
+        self.http = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(pool_connections=4, pool_maxsize=10)
+        self.http.mount('https://', adapter)
+        self.http.mount('http://', adapter)
 
         if self.access_token and self.api_key:
-            try:
-                self.kite = KiteConnect(api_key=self.api_key, access_token=self.access_token)
-                self.kite.profile()
+            self.kite = self._connect(self.access_token)
+            if self.token_is_current():
+                self.logged_in = True
+                logger.info("Using stored access token")
+            elif self.token_issued_at is None and self._probe():
+                # Token stored before issue times were recorded; it's good until the next reset
                 self.logged_in = True
+                self.token_issued_at = self._now()
+                self.settings.update(token_issued_at=self.token_issued_at.isoformat())
                 logger.info("Successfully logged in with existing access token")
-            except TokenException:
-                logger.warning("Existing access token invalid, attempting auto-login")
+            else:
+                logger.warning("Existing access token expired, attempting auto-login")
                 if self.auto_login():
                     logger.info("Successfully logged in with auto-login")
                     self.logged_in = True
 
+    @staticmethod
+    def _now():
+        return datetime.now(timezone.utc)
+
+    def _connect(self, access_token=None):
+        """KiteConnect client that shares this instance's HTTP session"""
+        kite = KiteConnect(api_key=self.api_key, access_token=access_token, root=self.api_root)
+        kite.reqsession = self.http
+        return kite
+
+    def _probe(self):
+        try:
+            self.kite.profile()
+            return True
+        except TokenException:
+            return False
+
+    def token_is_current(self):
+        """Whether the access token was issued after the last daily reset, judged locally"""
+        return bool(self.access_token and self.token_issued_at and self.token_issued_at >= last_token_reset())
+
     def auto_login(self):
         """Fully automated login using stored credentials and TOTP"""
         try:
@@ -45,21 +101,19 @@ class Kite:
 
             logger.info("Starting automated login process...")
 
-            # Create session
-            session = requests.Session()
-            session.headers.update({
-                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-            })
+            # Reuse the pooled session, the login cookies it collects are needed for step 3
+            session = self.http
+            headers = {'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'}
 
             # Step 1: Login
-            login_url = "https://kite.zerodha.com/api/login"
+            login_url = f"{self.login_root}/api/login"
             login_data = {
                 'user_id': self.user_id,
                 'password': self.password
             }
 
             logger.info("Submitting login credentials...")
-            login_response = session.post(login_url, data=login_data)
+            login_response = session.post(login_url, data=login_data, headers=headers)
 
             if login_response.status_code != 200:
                 logger.error(f"Login failed with status: {login_response.status_code}")
@@ -79,7 +133,7 @@ class Kite:
                 totp = pyotp.TOTP(self.totp_secret)
                 totp_code = totp.now()
 
-                totp_url = "https://kite.zerodha.com/api/twofa"
+                totp_url = f"{self.login_root}/api/twofa"
                 totp_data = {
                     'request_id': request_id,
                     'twofa_value': totp_code,
@@ -87,7 +141,7 @@ class Kite:
                 }
 
                 logger.info("Submitting TOTP code...")
-                totp_response = session.post(totp_url, data=totp_data)
+                totp_response = session.post(totp_url, data=totp_data, headers=headers)
 
                 if totp_response.status_code != 200:
                     logger.error(f"TOTP submission failed with status: {totp_response.status_code}")
@@ -100,26 +154,26 @@ class Kite:
                     return False
 
             # Step 3: Get authorization with redirects enabled
-            auth_url = f"https://kite.zerodha.com/connect/login?api_key={self.api_key}&v=3"
+            auth_url = f"{self.login_root}/connect/login?api_key={self.api_key}&v=3"
 
             logger.info("Getting authorization...")
             # This is the key fix - allow_redirects=True takes us to 127.0.0.1:3000 with request_token
             try:
-                auth_response = session.get(auth_url, allow_redirects=True, timeout=3)
+                url = session.get(auth_url, allow_redirects=True, timeout=3, headers=headers).url
             except Exception as e:
                 url = e.request.url
 
-                if 'request_token=' in url:
-                    parsed_url = urlparse(url)
-                    query_params = parse_qs(parsed_url.query)
-                    request_token = query_params.get('request_token', [None])[0]
+            if 'request_token=' in url:
+                parsed_url = urlparse(url)
+                query_params = parse_qs(parsed_url.query)
+                request_token = query_params.get('request_token', [None])[0]
 
-                    if request_token:
-                        logger.info(f"Request token obtained: {request_token[:10]}...")
-                        return self.create_session(request_token)
+                if request_token:
+                    logger.info(f"Request token obtained: {request_token[:10]}...")
+                    return self.create_session(request_token)
 
-                logger.error("Could not obtain request token")
-                return False
+            logger.error("Could not obtain request token")
+            return False
 
         except Exception as e:
             logger.error(f"Auto-login failed: {e}")
@@ -128,14 +182,15 @@ class Kite:
     def create_session(self, request_token):
         """Create session with request token"""
         try:
-            self.kite = KiteConnect(api_key=self.api_key)
+            self.kite = self._connect()
             self.session = self.kite.generate_session(request_token=request_token, api_secret=self.api_secret)
 
             self.access_token = self.session['access_token']
             self.session['login_time'] = str(self.session['login_time'])
+            self.token_issued_at = self._now()
 
-            self.write_key_to_settings('session', self.session)
-            self.write_key_to_settings('access_token', self.access_token)
+            self.settings.update(session=self.session, access_token=self.access_token,
+                                 token_issued_at=self.token_issued_at.isoformat())
 
             self.kite.set_access_token(self.access_token)
             self.logged_in = True
@@ -149,7 +204,7 @@ class Kite:
 
     def get_login_url(self):
         """Get login URL for manual login (fallback)"""
-        self.kite = KiteConnect(self.api_key)
+        self.kite = self._connect()
         return self.kite.login_url()
 
     def ensure_login(self):
@@ -160,49 +215,46 @@ class Kite:
         logger.info("Not logged in, attempting auto-login...")
         return self.auto_login()
 
-    def is_logged_in(self):
-        """Check if currently logged in"""
+    def is_logged_in(self, verify=False):
+        """Check if currently logged in, from the token's issue time unless verify asks the API"""
         if not self.logged_in or not self.kite:
             return False
 
-        try:
-            self.kite.profile()
-            return True
-        except TokenException:
+        if not self.token_is_current() or (verify and not self._probe()):
             self.logged_in = False
             return False
+        return True
 
     def setup_credentials(self):
         """Interactive setup for storing credentials"""
         print("Setting up Kite Connect credentials...")
+        values = {}
 
         if not self.api_key:
-            self.api_key = input('Enter your API key: ')
-            self.write_key_to_settings('api_key', self.api_key)
+            self.api_key = values['api_key'] = input('Enter your API key: ')
 
         if not self.api_secret:
-            self.api_secret = input('Enter your API secret: ')
-            self.write_key_to_settings('api_secret', self.api_secret)
+            self.api_secret = values['api_secret'] = input('Enter your API secret: ')
 
         if not self.user_id:
-            self.user_id = input('Enter your Zerodha user ID: ')
-            self.write_key_to_settings('user_id', self.user_id)
+            self.user_id = values['user_id'] = input('Enter your Zerodha user ID: ')
 
         if not self.password:
             import getpass
-            self.password = getpass.getpass('Enter your Zerodha password: ')
-            self.write_key_to_settings('password', self.password)
+            self.password = values['password'] = getpass.getpass('Enter your Zerodha password: ')
 
         if not self.totp_secret:
-            self.totp_secret = input('Enter your TOTP secret key: ')
-            self.write_key_to_settings('totp_secret', self.totp_secret)
+            self.totp_secret = values['totp_secret'] = input('Enter your TOTP secret key: ')
 
-        if not self.read_key_from_settings('redirect_uri'):
+        if not self.settings.get('redirect_uri'):
             redirect_uri = input('Enter redirect URI (default: https://127.0.0.1:3000): ').strip()
             if not redirect_uri:
                 redirect_uri = "https://127.0.0.1:3000"
-            self.write_key_to_settings('redirect_uri', redirect_uri)
+            values['redirect_uri'] = redirect_uri
 
+        # Everything entered is saved in a single write
+        if values:
+            self.write_settings(values)
         print("Credentials setup complete!")
 
     def test_totp(self):
@@ -220,32 +272,17 @@ class Kite:
             logger.error(f"TOTP generation failed: {e}")
             return False
 
-    def write_key_to_settings(self, key, value):
-        """Write key-value pair to settings file"""
+    def write_settings(self, values):
+        """Write several key-value pairs to the settings file at once"""
         try:
-            try:
-                with open(self.init_file, 'r') as file:
-                    data = json.load(file)
-            except (IOError, json.JSONDecodeError):
-                data = {
-                    "api_key": "", "api_secret": "", "redirect_uri": "",
-                    "access_token": "", "user_id": "", "password": "",
-                    "totp_secret": "", "session": {}
-                }
-
-            data[key] = value
-
-            with open(self.init_file, 'w') as output_file:
-                json.dump(data, output_file, indent=2)
-
+            self.settings.update(values)
         except Exception as e:
             logger.error(f"Failed to write settings: {e}")
 
+    def write_key_to_settings(self, key, value):
+        """Write key-value pair to settings file"""
+        self.write_settings({key: value})
+
     def read_key_from_settings(self, key):
-        """Read key from settings file"""
-        try:
-            with open(self.init_file, 'r') as file:
-                data = json.load(file)
-                return data.get(key)
-        except (IOError, json.JSONDecodeError):
-            return None
\ No newline at end of file
+        """Read key from settings, the file is only parsed once"""
+        return self.settings.get(key)
@@ -5,9 +5,10 @@ import time
 import sys
 from collections import defaultdict, deque
 from sqlalchemy import select
-from app import db, create_app
+from app import db, create_engine_app
 from app.models import Ticker, User, Trade
 from kite import Kite
+from kite.instruments import instrument_cache
 import threading
 import pytz
 
@@ -21,6 +22,9 @@ logger = logging.getLogger(__name__)
 # IST timezone
 IST = pytz.timezone('Asia/Kolkata')
 
+# How often to look for tickers changed by reload_tickers.py, in seconds
+SYNC_POLL_INTERVAL = 60
+
 
 class CandleData:
     """Represents a 5-second candle"""
@@ -52,7 +56,7 @@ class TickerManager:
     def __init__(self):
         self.kws = None
         self.tickers = {}
-        self.app = create_app()
+        self.app = create_engine_app()
         self.k = None
         self.is_running = False
         self.current_candles = {}
@@ -61,6 +65,8 @@ class TickerManager:
         self.candle_timer = None
         self.connected = False
         self.should_exit = False
+        self.synced_at = None
+        self.synced_checked_at = 0.0
 
     def is_market_open(self):
         """Check if market is currently open"""
@@ -119,6 +125,8 @@ class TickerManager:
         """Process completed candles every second"""
         if not self.should_exit:
             self.process_completed_candles()
+            if time.monotonic() - self.synced_checked_at >= SYNC_POLL_INTERVAL:
+                self.refresh_synced_tickers()
             # Check if market is still open
             if not self.is_market_open():
                 logger.info("Market closed during processing. Initiating shutdown...")
@@ -135,14 +143,76 @@ class TickerManager:
     def load_tickers(self):
         try:
             with self.app.app_context():
-                stmt = select(Ticker)
+                stmt = select(Ticker).where(Ticker.is_active)
                 tickers = db.session.execute(stmt).scalars().all()
                 self.tickers = {ticker.instrument_token: ticker for ticker in tickers}
-                return list(self.tickers.keys())
+                self.synced_at = max((ticker.synced_at for ticker in tickers if ticker.synced_at), default=None)
+                self.synced_checked_at = time.monotonic()
+                return self.listed_tokens(tickers)
         except Exception as e:
             logger.error(f"Failed to load tickers: {e}")
             return []
 
+    def listed_tokens(self, tickers):
+        """Tokens of tickers listed in today's instrument dump (cached on disk, fetched once a day)"""
+        by_exchange = defaultdict(list)
+        for ticker in tickers:
+            by_exchange[ticker.exchange].append(ticker.instrument_token)
+
+        listed = []
+        for exchange, tokens in by_exchange.items():
+            try:
+                master = instrument_cache.load(exchange, lambda: self.k.kite.instruments(exchange))
+            except Exception as e:
+                logger.warning(f"Instrument dump for {exchange} unavailable, subscribing to all tickers: {e}")
+                listed.extend(tokens)
+                continue
+            mask = master.has_tokens(tokens)
+            if not mask.all():
+                missing = len(tokens) - int(mask.sum())
+                logger.warning(f"Skipping {missing} {exchange} tickers missing from the instrument dump")
+            listed.extend(token for token, is_listed in zip(tokens, mask) if is_listed)
+        return listed
+
+    def refresh_synced_tickers(self):
+        """Pick up tickers changed by an instrument sync since the last check and adjust subscriptions"""
+        self.synced_checked_at = time.monotonic()
+        if not self.connected:
+            return
+        try:
+            with self.app.app_context():
+                stmt = select(Ticker)
+                if self.synced_at is not None:
+                    # Otherwise the engine started against an empty ticker table and every ticker is new
+                    stmt = stmt.where(Ticker.synced_at > self.synced_at)
+                changed = db.session.execute(stmt).scalars().all()
+        except Exception as e:
+            logger.error(f"Failed to refresh synced tickers: {e}")
+            return
+        if not changed:
+            return
+
+        subscribe, unsubscribe = [], []
+        # Tokens the sync moved to another instrument_token, keyed by ticker id
+        previous = {ticker.id: token for token, ticker in self.tickers.items()}
+        for ticker in changed:
+            old_token = previous.get(ticker.id)
+            if old_token is not None and (old_token != ticker.instrument_token or not ticker.is_active):
+                self.tickers.pop(old_token, None)
+                unsubscribe.append(old_token)
+            if ticker.is_active:
+                if ticker.instrument_token not in self.tickers:
+                    subscribe.append(ticker.instrument_token)
+                self.tickers[ticker.instrument_token] = ticker
+        self.synced_at = max(ticker.synced_at for ticker in changed)
+
+        if unsubscribe:
+            self.kws.unsubscribe(unsubscribe)
+        if subscribe:
+            self.kws.subscribe(subscribe)
+            self.kws.set_mode(self.kws.MODE_FULL, subscribe)
+        logger.info(f"Instrument sync: subscribed {len(subscribe)}, unsubscribed {len(unsubscribe)} instruments")
+
     def is_trading_hours(self, tick_time):
         tick_time_ist = tick_time.astimezone(IST)
         if tick_time_ist.weekday() >= 5:
@@ -225,8 +295,12 @@ class TickerManager:
                         logger.info(f"Trade status changed: {trade} (Candle: {candle})")
                         self.send_trade_notification(trade.user, trade)
                     trade.update_etas()
+                # ETAs of all the ticker's trades in one commit
+                db.session.commit()
         except Exception as e:
             logger.error(f"Error checking trades for ticker {ticker_id}: {e}")
+            with self.app.app_context():
+                db.session.rollback()
 
     def send_kite_login_alert(self, user):
         """Send Kite login alert - implement as per your notification system"""
@@ -0,0 +1,8 @@
+from app import create_engine_app, db
+from app.models import TradeSummary
+
+app = create_engine_app()
+
+with app.app_context():
+    TradeSummary.rebuild()
+    db.session.commit()
@@ -0,0 +1,11 @@
+import sys
+from app import create_engine_app
+from app.models import Ticker, Tag
+
+MODELS = {model.__tablename__: model for model in (Ticker, Tag)}
+
+app = create_engine_app()
+
+with app.app_context():
+    for name in sys.argv[1:] or MODELS:
+        MODELS[name].reindex()
@@ -1,24 +1,22 @@
+"""Sync the ticker table with today's NSE instrument dump, limited to the symbols in stocks.csv.
+
+Only new, changed and delisted instruments are written, so it is safe to run repeatedly. The
+dump is downloaded once per trading day and served from kite/cache after that.
+"""
 from kite import Kite
-from app import create_app, db
-from app.models import Ticker
-import pandas as pd
+from kite.instruments import instrument_cache
+from app import create_engine_app, db
+from app.utils.instrument_sync import load_universe, sync_instruments
 
-df = pd.read_csv('stocks.csv')
+universe = load_universe('stocks.csv')
 
-kite = Kite().kite
-instruments = kite.instruments("NSE")
-instruments = [i for i in instruments if i['tradingsymbol'] in df['SYMBOL'].values]
+# Kite only logs in when the cached dump is stale
+master = instrument_cache.load("NSE", lambda: Kite().kite.instruments("NSE"))
+instruments = master.frame(['instrument_token', 'tradingsymbol', 'name', 'exchange'])
 
-app = create_app()
+app = create_engine_app()
 
 with app.app_context():
-    for i in instruments:
-        ticker = Ticker(
-            symbol=i['tradingsymbol'],
-            exchange=i['exchange'],
-            instrument_token=i['instrument_token'],
-            name=i['name'],
-        )
-        db.session.add(ticker)
-
+    result = sync_instruments(instruments, universe, exchange="NSE")
     db.session.commit()
+    print(f"Instrument sync: {result}")
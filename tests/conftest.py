@@ -0,0 +1,23 @@
+import pytest
+from config import Config
+from app import create_app, db
+
+
+@pytest.fixture
+def app(tmp_path):
+    config = type('TestConfig', (Config,), {
+        'SQLALCHEMY_DATABASE_URI': f'sqlite:///{tmp_path / "test.db"}',
+        'SEARCH_BACKEND': 'none',
+        'PASSWORD_HASH_WORKERS': 0,
+    })
+    app = create_app(config)
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.engine.dispose()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
@@ -0,0 +1,112 @@
+"""JWKSCache against a local JWKS endpoint: one fetch per refresh, max-age and unknown-kid refetches"""
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import jwt as pyjwt
+import pytest
+from cryptography.hazmat.primitives.asymmetric import rsa
+from app.utils import jwks
+from app.utils.jwks import JWKSCache
+
+
+def make_jwk(kid):
+    key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    return dict(json.loads(pyjwt.algorithms.RSAAlgorithm.to_jwk(key.public_key())), kid=kid)
+
+
+class Endpoint:
+    """What the stub server serves, and how often it was asked"""
+
+    def __init__(self):
+        self.keys = [make_jwk('a')]
+        self.max_age = 60
+        self.delay = 0
+        self.fetches = 0
+
+
+@pytest.fixture
+def endpoint():
+    state = Endpoint()
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            state.fetches += 1
+            time.sleep(state.delay)
+            body = json.dumps({'keys': state.keys}).encode()
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Cache-Control', f'public, max-age={state.max_age}')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    state.url = f'http://127.0.0.1:{server.server_port}/certs'
+    yield state
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Monotonic time that only moves when the test says so"""
+    class Clock:
+        now = 1000.0
+
+        def monotonic(self):
+            return self.now
+
+    clock = Clock()
+    monkeypatch.setattr(jwks, 'time', clock)
+    return clock
+
+
+def test_concurrent_lookups_share_one_fetch(endpoint):
+    endpoint.delay = 0.3
+    cache = JWKSCache(endpoint.url)
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.get_key('a'))) for _ in range(10)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert endpoint.fetches == 1
+    assert len(results) == 10 and all(key is not None for key in results)
+
+
+def test_refetches_when_max_age_runs_out(endpoint, clock):
+    cache = JWKSCache(endpoint.url)
+    assert cache.get_key('a') is not None
+    clock.now += 59
+    assert cache.get_key('a') is not None
+    assert endpoint.fetches == 1
+
+    clock.now += 1
+    assert cache.get_key('a') is not None
+    assert endpoint.fetches == 2
+
+
+def test_unknown_kid_refreshes_at_most_once_per_interval(endpoint, clock):
+    cache = JWKSCache(endpoint.url, min_refresh_interval=10)
+    assert cache.get_key('a') is not None
+
+    # A key rotated in upstream isn't picked up by unknown kids until the interval has passed
+    endpoint.keys.append(make_jwk('b'))
+    for _ in range(5):
+        clock.now += 1
+        assert cache.get_key('unknown') is None
+    assert endpoint.fetches == 1
+
+    clock.now += 5
+    assert cache.get_key('b') is not None
+    assert endpoint.fetches == 2
+    assert cache.get_key('unknown') is None
+    assert cache.get_key('a') is not None
+    assert endpoint.fetches == 2
@@ -0,0 +1,208 @@
+"""Kite settings persistence, the 06:00 IST token reset and the login flow against a stub server"""
+import hashlib
+import json
+import os
+import stat
+import threading
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+import pyotp
+import pytest
+from kite import setup
+from kite.settings import SettingsStore
+from kite.setup import Kite, IST, last_token_reset
+
+CREDENTIALS = {'api_key': 'key', 'api_secret': 'secret', 'user_id': 'AB1234', 'password': 'pw',
+               'totp_secret': pyotp.random_base32()}
+
+
+def ist(*args):
+    return IST.localize(datetime(*args))
+
+
+def write_settings(path, **values):
+    path.write_text(json.dumps(dict(CREDENTIALS, **values)))
+    return str(path)
+
+
+# -----------------------
+# SETTINGS
+# -----------------------
+def test_update_replaces_the_file_and_keeps_its_mode(tmp_path):
+    path = write_settings(tmp_path / 'kite.json', access_token='old')
+    os.chmod(path, 0o640)
+    inode = os.stat(path).st_ino
+
+    store = SettingsStore(path)
+    store.update({'access_token': 'new'}, token_issued_at='2026-01-01T00:00:00+00:00')
+
+    assert os.stat(path).st_ino != inode
+    assert stat.S_IMODE(os.stat(path).st_mode) == 0o640
+    assert json.loads(open(path).read())['access_token'] == 'new'
+    assert store.reload()['token_issued_at'] == '2026-01-01T00:00:00+00:00'
+    assert os.listdir(tmp_path) == ['kite.json']
+
+
+def test_failed_update_leaves_the_file_alone(tmp_path):
+    path = write_settings(tmp_path / 'kite.json', access_token='old')
+    before = open(path).read()
+
+    store = SettingsStore(path)
+    with pytest.raises(TypeError):
+        store.update(access_token=object())
+
+    assert open(path).read() == before
+    assert store.get('access_token') == 'old'
+    assert os.listdir(tmp_path) == ['kite.json']
+
+
+# -----------------------
+# TOKEN RESET
+# -----------------------
+@pytest.mark.parametrize('now, reset', [
+    (ist(2026, 3, 10, 5, 59, 59), ist(2026, 3, 9, 6)),
+    (ist(2026, 3, 10, 6, 0, 0), ist(2026, 3, 10, 6)),
+    (ist(2026, 3, 10, 23, 30), ist(2026, 3, 10, 6)),
+    # 00:30 UTC is already 06:00 IST
+    (datetime(2026, 3, 10, 0, 30, tzinfo=timezone.utc), ist(2026, 3, 10, 6)),
+])
+def test_last_token_reset(now, reset):
+    assert last_token_reset(now) == reset
+
+
+@pytest.mark.parametrize('issued, now, current', [
+    (ist(2026, 3, 10, 5, 59), ist(2026, 3, 10, 5, 59, 30), True),
+    (ist(2026, 3, 10, 5, 59), ist(2026, 3, 10, 6, 0, 1), False),
+    (ist(2026, 3, 10, 6, 0, 1), ist(2026, 3, 11, 5, 59), True),
+    (ist(2026, 3, 10, 6, 0, 1), ist(2026, 3, 11, 6, 0), False),
+])
+def test_token_is_current_around_the_reset(tmp_path, monkeypatch, issued, now, current):
+    monkeypatch.setattr(setup, 'last_token_reset', lambda: last_token_reset(now))
+    path = write_settings(tmp_path / 'kite.json', access_token='stored', token_issued_at=issued.isoformat())
+
+    # A current token is trusted without any network call
+    monkeypatch.setattr(Kite, 'auto_login', lambda self: False)
+    kite = Kite(path, login_root='http://127.0.0.1:9', api_root='http://127.0.0.1:9')
+    assert kite.token_is_current() is current
+    assert kite.logged_in is current
+
+
+# -----------------------
+# LOGIN FLOW
+# -----------------------
+class StubKite:
+    """Login pages under login_root and the REST API under api_root, in one server"""
+
+    def __init__(self):
+        self.requests = []
+        self.access_tokens = {'legacy-token'}
+
+    def handle(self, handler, method):
+        url = urlparse(handler.path)
+        form = parse_qs(handler.rfile.read(int(handler.headers.get('Content-Length') or 0)).decode())
+        form = {key: values[0] for key, values in form.items()}
+        query = {key: values[0] for key, values in parse_qs(url.query).items()}
+        self.requests.append((method, url.path))
+
+        if url.path == '/api/login':
+            if (form.get('user_id'), form.get('password')) != (CREDENTIALS['user_id'], CREDENTIALS['password']):
+                return 200, {'status': 'error', 'message': 'Invalid credentials'}, {}
+            return 200, {'status': 'success', 'data': {'request_id': 'req-1'}}, {'Set-Cookie': 'kf_session=abc; Path=/'}
+        if url.path == '/api/twofa':
+            valid = form.get('request_id') == 'req-1' and pyotp.TOTP(CREDENTIALS['totp_secret']).verify(
+                form.get('twofa_value'), valid_window=1)
+            return 200, {'status': 'success' if valid else 'error', 'data': {}}, {}
+        if url.path == '/connect/login':
+            # Only a logged-in browser session is redirected back with a request token
+            if 'kf_session=abc' not in (handler.headers.get('Cookie') or '') or query.get('api_key') != 'key':
+                return 403, {'status': 'error'}, {}
+            return 302, None, {'Location': '/callback?request_token=rt-1&status=success'}
+        if url.path == '/callback':
+            return 200, {}, {}
+        if url.path == '/session/token':
+            checksum = hashlib.sha256(b'key' + form.get('request_token', '').encode() + b'secret').hexdigest()
+            if form.get('checksum') != checksum:
+                return 403, {'status': 'error', 'error_type': 'TokenException', 'message': 'Bad checksum'}, {}
+            self.access_tokens.add('fresh-token')
+            return 200, {'status': 'success', 'data': {'access_token': 'fresh-token', 'user_id': 'AB1234',
+                                                       'login_time': '2026-03-10 09:15:00'}}, {}
+        if url.path == '/user/profile':
+            token = (handler.headers.get('Authorization') or '').rpartition(':')[2]
+            if token not in self.access_tokens:
+                return 403, {'status': 'error', 'error_type': 'TokenException', 'message': 'Expired'}, {}
+            return 200, {'status': 'success', 'data': {'user_id': 'AB1234'}}, {}
+        return 404, {'status': 'error'}, {}
+
+
+@pytest.fixture
+def stub():
+    state = StubKite()
+
+    class Handler(BaseHTTPRequestHandler):
+        def respond(self, method):
+            status, body, headers = state.handle(self, method)
+            data = json.dumps(body).encode() if body is not None else b''
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(data)))
+            for name, value in headers.items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_GET(self):
+            self.respond('GET')
+
+        def do_POST(self):
+            self.respond('POST')
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    state.root = f'http://127.0.0.1:{server.server_port}'
+    yield state
+    server.shutdown()
+    server.server_close()
+
+
+def test_expired_token_logs_in_again_through_the_stub(tmp_path, stub):
+    yesterday = datetime.now(timezone.utc) - timedelta(days=2)
+    path = write_settings(tmp_path / 'kite.json', access_token='expired', token_issued_at=yesterday.isoformat())
+
+    kite = Kite(path, login_root=stub.root, api_root=stub.root)
+
+    assert kite.logged_in and kite.is_logged_in()
+    assert kite.access_token == 'fresh-token'
+    assert stub.requests == [('POST', '/api/login'), ('POST', '/api/twofa'), ('GET', '/connect/login'),
+                             ('GET', '/callback'), ('POST', '/session/token')]
+    saved = json.loads(open(path).read())
+    assert saved['access_token'] == 'fresh-token'
+    assert datetime.fromisoformat(saved['token_issued_at']) >= last_token_reset()
+
+    # The next start trusts the stored token without touching the network
+    stub.requests.clear()
+    assert Kite(path, login_root=stub.root, api_root=stub.root).logged_in
+    assert stub.requests == []
+
+
+def test_token_without_issue_time_is_probed_once(tmp_path, stub):
+    path = write_settings(tmp_path / 'kite.json', access_token='legacy-token')
+
+    kite = Kite(path, login_root=stub.root, api_root=stub.root)
+
+    assert kite.logged_in
+    assert stub.requests == [('GET', '/user/profile')]
+    assert json.loads(open(path).read())['token_issued_at'] == kite.token_issued_at.isoformat()
+
+
+def test_wrong_password_fails_without_a_session(tmp_path, stub):
+    path = write_settings(tmp_path / 'kite.json', access_token='expired', password='wrong')
+
+    kite = Kite(path, login_root=stub.root, api_root=stub.root)
+
+    assert not kite.logged_in
+    assert stub.requests == [('GET', '/user/profile'), ('POST', '/api/login')]
+    assert json.loads(open(path).read())['access_token'] == 'expired'
@@ -0,0 +1,153 @@
+"""SearchIndexer against a fake bulk() client: per-commit dedup, rollbacks, batching and retries"""
+import threading
+import pytest
+from app import db
+from app.models import User, Tag
+from app.search import elastic
+from app.search.elastic import SearchIndexer, search_indexer, send_bulk
+
+
+class FakeIndices:
+    def __init__(self):
+        self.aliases = {}
+
+    def get_alias(self, name):
+        return self.aliases
+
+
+class FakeClient:
+    """Records each bulk request as [(action, index, id, document)]; statuses come from respond"""
+
+    def __init__(self, respond=None):
+        self.respond = respond or (lambda action, key, call: 201)
+        self.requests = []
+        self.indices = FakeIndices()
+
+    def bulk(self, operations):
+        request = []
+        operations = iter(operations)
+        for operation in operations:
+            (action, meta), = operation.items()
+            document = None if action == 'delete' else next(operations)
+            request.append((action, meta['_index'], meta['_id'], document))
+        self.requests.append(request)
+        call = len(self.requests)
+        return {'items': [{action: {'status': self.respond(action, (index, doc_id), call)}}
+                          for action, index, doc_id, _ in request]}
+
+
+@pytest.fixture
+def bulk_client(app):
+    fake = FakeClient()
+    search_indexer.configure(fake)
+    yield fake
+    search_indexer.flush()
+    search_indexer.configure(None)
+
+
+@pytest.fixture
+def user(app):
+    user = User(name='indexer', email='indexer@example.com')
+    db.session.add(user)
+    db.session.commit()
+    return user
+
+
+def test_changes_are_deduplicated_per_commit(bulk_client, user):
+    tag = Tag(name='first', user=user)
+    db.session.add(tag)
+    db.session.flush()
+    tag.name = 'second'
+    db.session.flush()
+    tag.name = 'final'
+    db.session.commit()
+    search_indexer.flush()
+
+    assert bulk_client.requests == [[('index', 'tag', tag.id, {'name': 'final', 'user_id': user.id})]]
+
+
+def test_changes_are_dropped_on_rollback(bulk_client, user):
+    db.session.add(Tag(name='discarded', user=user))
+    db.session.flush()
+    db.session.rollback()
+
+    tag = Tag(name='kept', user=user)
+    db.session.add(tag)
+    db.session.commit()
+    search_indexer.flush()
+
+    assert [[doc_id for _, _, doc_id, _ in request] for request in bulk_client.requests] == [[tag.id]]
+
+
+def test_queued_changes_are_coalesced_into_batches():
+    started, release = threading.Event(), threading.Event()
+
+    def respond(action, key, call):
+        if call == 1:
+            started.set()
+            release.wait(5)
+        return 201
+
+    fake = FakeClient(respond)
+    indexer = SearchIndexer(fake, batch_size=4)
+    indexer.submit({('tag', 'a'): {'name': 'a'}})
+    assert started.wait(5)
+
+    # Queued while the worker is busy: picked up together, latest document per id
+    indexer.submit({('tag', 'b'): {'name': 'b'}, ('tag', 'c'): {'name': 'c'}})
+    indexer.submit({('tag', 'c'): {'name': 'c2'}, ('tag', 'd'): None})
+    indexer.submit({('tag', 'e'): {'name': 'e'}, ('tag', 'f'): {'name': 'f'}})
+    release.set()
+    indexer.flush()
+
+    first, *rest = fake.requests
+    assert [doc_id for _, _, doc_id, _ in first] == ['a']
+    assert len(rest) == 2 and all(len(request) <= 4 for request in rest)
+    sent = {doc_id: (action, document) for request in rest for action, _, doc_id, document in request}
+    assert sent == {'b': ('index', {'name': 'b'}), 'c': ('index', {'name': 'c2'}), 'd': ('delete', None),
+                    'e': ('index', {'name': 'e'}), 'f': ('index', {'name': 'f'})}
+
+
+def test_rebuild_alias_is_written_to_from_the_next_request():
+    fake = FakeClient()
+    indexer = SearchIndexer(fake)
+    indexer.submit({('tag', 'a'): {'name': 'a'}})
+    indexer.flush()
+
+    # reindex_all added the alias: no waiting for indexers to notice
+    fake.indices.aliases = {'tag-20260101000000000000': {'aliases': {'tag-rebuild': {}}}}
+    indexer.submit({('tag', 'b'): {'name': 'b'}})
+    indexer.flush()
+
+    assert fake.requests == [[('index', 'tag', 'a', {'name': 'a'})],
+                             [('index', 'tag', 'b', {'name': 'b'}), ('index', 'tag-rebuild', 'b', {'name': 'b'})]]
+
+
+def test_rejected_items_are_retried_with_backoff(monkeypatch):
+    delays = []
+    monkeypatch.setattr(elastic.time, 'sleep', delays.append)
+    statuses = {'busy': [429], 'unavailable': [503, 502], 'invalid': [400]}
+
+    def respond(action, key, call):
+        pending = statuses.get(key[1])
+        return pending.pop(0) if pending else 201
+
+    fake = FakeClient(respond)
+    changes = {('tag', doc_id): {'name': doc_id} for doc_id in ('ok', 'busy', 'unavailable', 'invalid')}
+    dropped = send_bulk(fake, changes, max_retries=5, backoff=0.5)
+
+    # Only the rejected items are resent, the invalid one is dropped without a retry
+    assert [[doc_id for _, _, doc_id, _ in request] for request in fake.requests] == \
+        [['ok', 'busy', 'unavailable', 'invalid'], ['busy', 'unavailable'], ['unavailable']]
+    assert delays == [0.5, 1.0]
+    assert dropped == 1
+
+
+def test_retries_give_up_after_max_retries(monkeypatch):
+    delays = []
+    monkeypatch.setattr(elastic.time, 'sleep', delays.append)
+
+    fake = FakeClient(lambda action, key, call: 429)
+    assert send_bulk(fake, {('tag', 'a'): {'name': 'a'}, ('tag', 'b'): None}, max_retries=3, backoff=0.1) == 2
+    assert len(fake.requests) == 4
+    assert delays == pytest.approx([0.1, 0.2, 0.4])
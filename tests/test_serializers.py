@@ -0,0 +1,31 @@
+"""json_response sends the same bytes as jsonify, whether or not orjson is installed"""
+import pytest
+from flask import jsonify
+from app.utils import serializers
+from app.utils.serializers import json_response
+
+PAYLOADS = [
+    {'trades': [{'symbol': 'TATAMOTORS', 'entry': 812.35, 'stoploss': None, 'score': 3, 'active': True}],
+     'total': 1, 'page': 1},
+    {'notes': 'Résumé – target ₹1,200 🚀', 'tags': ['données', 'テスト'], 'control': 'tab\there\x7f\x01'},
+    {'nested': {'z': [], 'a': {'é': 'ü'}}, 'empty': ''},
+]
+
+
+@pytest.mark.parametrize('payload', PAYLOADS)
+def test_json_response_matches_jsonify(app, payload):
+    with app.test_request_context():
+        expected = jsonify(payload).get_data()
+        response, status = json_response(payload), 200
+        if isinstance(response, tuple):
+            response, status = response
+        assert status == 200
+        assert response.get_data() == expected
+        assert response.mimetype == 'application/json'
+
+
+@pytest.mark.parametrize('payload', PAYLOADS)
+def test_dumps_matches_stdlib(app, payload, monkeypatch):
+    fast = serializers.dumps(payload)
+    monkeypatch.setattr(serializers, 'orjson', None)
+    assert fast == serializers.dumps(payload)
@@ -0,0 +1,46 @@
+"""Creating or updating a trade writes the trade, its summary counts and its ETAs in one commit"""
+import pytest
+from sqlalchemy import event
+from app import db
+from app.models import User, Ticker, TradeSummary
+from app.utils.auth import create_tokens
+
+
+@pytest.fixture
+def headers(app):
+    user = User(name='commits', email='commits@example.com')
+    user.set_password('password')
+    db.session.add_all([user, Ticker(symbol='ONE', exchange='NSE', instrument_token=1, name='One Ltd',
+                                     last_price=100.0)])
+    db.session.commit()
+    return {'Authorization': f'Bearer {create_tokens(user)[0]}'}
+
+
+def count_commits(request):
+    commits = []
+    listener = lambda session: commits.append(session)
+    event.listen(db.session, 'after_commit', listener)
+    try:
+        response = request()
+    finally:
+        event.remove(db.session, 'after_commit', listener)
+    assert response.status_code < 300, response.json
+    return len(commits), response.json['trade']
+
+
+def test_create_and_update_commit_once(client, headers):
+    ticker_id = db.session.query(Ticker.id).scalar()
+    commits, trade = count_commits(lambda: client.post('/api/trades/', headers=headers, json={
+        'ticker_id': ticker_id, 'side': 'BUY', 'entry': 150.0, 'stoploss': 90.0, 'target': 200.0,
+        'timeframe': '1D'}))
+    assert commits == 1
+    assert trade['entry_eta'] is not None
+
+    commits, trade = count_commits(lambda: client.put(f"/api/trades/{trade['id']}", headers=headers, json={
+        'entry': 80.0, 'timeframe': '1W'}))
+    assert commits == 1
+    assert trade['entry_eta'] is not None
+
+    db.session.remove()
+    timeframes = {row.key: row.total for row in TradeSummary.query.filter_by(dimension='timeframe')}
+    assert timeframes == {'1D': 0, '1W': 1}
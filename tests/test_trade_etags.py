@@ -0,0 +1,50 @@
+"""Trade ETags change with everything the trade responses show: tags and synced ticker metadata included"""
+from datetime import datetime, timedelta, timezone
+import pytest
+from app import db
+from app.models import User, Ticker, Tag, Trade, TradeSide, TradeType
+from app.utils.auth import create_tokens
+
+
+@pytest.fixture
+def trade(app):
+    user = User(name='etags', email='etags@example.com')
+    user.set_password('password')
+    ticker = Ticker(symbol='ONE', exchange='NSE', instrument_token=1, name='One Ltd', last_price=100.0)
+    trade = Trade(user=user, ticker=ticker, symbol='ONE', side=TradeSide.BUY, type=TradeType.CROSSING_ABOVE,
+                  entry=150.0, tags=[Tag(name='swing', user=user)])
+    db.session.add(trade)
+    db.session.commit()
+    return trade.id, {'Authorization': f'Bearer {create_tokens(user)[0]}'}
+
+
+def etags(client, trade_id, headers):
+    return client.get('/api/trades/', headers=headers).headers['ETag'], \
+        client.get(f'/api/trades/{trade_id}', headers=headers).headers['ETag']
+
+
+def test_tag_rename_changes_etags(client, trade):
+    trade_id, headers = trade
+    before = etags(client, trade_id, headers)
+
+    db.session.scalar(db.select(Tag)).name = 'positional'
+    db.session.commit()
+
+    after = etags(client, trade_id, headers)
+    assert after[0] != before[0] and after[1] != before[1]
+    assert client.get(f'/api/trades/{trade_id}', headers=headers).json['trade']['tags'][0]['name'] == 'positional'
+
+
+def test_ticker_sync_changes_etags(client, trade):
+    trade_id, headers = trade
+    before = etags(client, trade_id, headers)
+
+    # As sync_instruments writes it: new metadata and synced_at, prices untouched
+    ticker = db.session.scalar(db.select(Ticker))
+    ticker.name = 'One Industries Ltd'
+    ticker.synced_at = datetime.now(timezone.utc) + timedelta(seconds=1)
+    db.session.commit()
+
+    after = etags(client, trade_id, headers)
+    assert after[0] != before[0] and after[1] != before[1]
+    assert etags(client, trade_id, headers) == after
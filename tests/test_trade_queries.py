@@ -0,0 +1,69 @@
+"""The trade read routes load tickers and tags in a fixed number of queries, whatever the list size"""
+from itertools import count
+from sqlalchemy import event
+from app import db
+from app.models import User, Ticker, Tag, Trade, TradeSide, TradeType
+from app.utils.auth import create_tokens
+
+TAGS_PER_TRADE = 3
+instrument_tokens = count(1)
+
+
+def seed_user(email, trades):
+    """User with trades, each on its own ticker and with its own tags, returns (auth headers, trade ids)"""
+    user = User(name=email, email=email)
+    user.set_password('password')
+    db.session.add(user)
+    db.session.flush()
+    for i in range(trades):
+        ticker = Ticker(symbol=f'{email[:3].upper()}{i}', exchange='NSE', instrument_token=next(instrument_tokens),
+                        name=f'Company {i} Ltd', last_price=100.0 + i)
+        tags = [Tag(name=f'tag{i}-{j}', user=user) for j in range(TAGS_PER_TRADE)]
+        db.session.add(Trade(user=user, ticker=ticker, symbol=ticker.symbol, side=TradeSide.BUY,
+                             type=TradeType.CROSSING_ABOVE, entry=150.0, stoploss=90.0, target=200.0, tags=tags))
+    db.session.commit()
+    trade_ids = [trade.id for trade in user.trades]
+    return {'Authorization': f'Bearer {create_tokens(user)[0]}'}, trade_ids
+
+
+def count_queries(client, url, headers):
+    # Warm up per-process caches (request identity) so both runs take the same path
+    assert client.get(url, headers=headers).status_code == 200
+    db.session.remove()
+
+    statements = []
+
+    def record(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(db.engine, 'before_cursor_execute', record)
+    try:
+        response = client.get(url, headers=headers)
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', record)
+    assert response.status_code == 200
+    return len(statements), response.json
+
+
+def test_trade_list_query_count_is_constant(client):
+    few, _ = seed_user('few@example.com', 2)
+    many, _ = seed_user('many@example.com', 50)
+
+    few_count, few_body = count_queries(client, '/api/trades/', few)
+    many_count, many_body = count_queries(client, '/api/trades/', many)
+
+    assert len(few_body['trades']) == 2
+    assert len(many_body['trades']) == 50
+    assert all(len(trade['tags']) == TAGS_PER_TRADE and trade['ticker'] for trade in many_body['trades'])
+    assert few_count == many_count
+
+
+def test_trade_detail_query_count_is_constant(client):
+    few, few_ids = seed_user('few@example.com', 2)
+    many, many_ids = seed_user('many@example.com', 50)
+
+    few_count, _ = count_queries(client, f'/api/trades/{few_ids[0]}', few)
+    many_count, body = count_queries(client, f'/api/trades/{many_ids[0]}', many)
+
+    assert len(body['trade']['tags']) == TAGS_PER_TRADE
+    assert few_count == many_count
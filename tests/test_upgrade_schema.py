@@ -0,0 +1,52 @@
+"""upgrade_schema brings tables created before the computed columns, revisions and summaries up to date"""
+import sqlalchemy as sa
+from app import db
+from app.models import User, Ticker, Trade, TradeSide, TradeType
+from app.utils.database import upgrade_schema
+
+ADDED_COLUMNS = {
+    'trade': ['risk_per_unit', 'reward_per_unit', 'risk_reward_ratio', 'revision'],
+    'ticker': ['is_active', 'synced_at'],
+}
+
+
+def downgrade(table, dropped):
+    """Recreate table without the dropped columns or any indexes, as an older version left it"""
+    columns = ', '.join(f'"{column.name}"' for column in table.columns if column.name not in dropped)
+    with db.engine.begin() as connection:
+        connection.exec_driver_sql(f'CREATE TABLE "_{table.name}_old" AS SELECT {columns} FROM "{table.name}"')
+        connection.exec_driver_sql(f'DROP TABLE "{table.name}"')
+        connection.exec_driver_sql(f'ALTER TABLE "_{table.name}_old" RENAME TO "{table.name}"')
+
+
+def test_upgrade_keeps_rows_and_adds_columns(app):
+    user = User(name='old', email='old@example.com')
+    ticker = Ticker(symbol='OLD', exchange='NSE', instrument_token=1, name='Old Ltd', last_price=100.0)
+    trade = Trade(user=user, ticker=ticker, symbol='OLD', side=TradeSide.BUY, type=TradeType.CROSSING_ABOVE,
+                  entry=100.0, stoploss=90.0, target=130.0)
+    db.session.add(trade)
+    db.session.commit()
+    trade_id = trade.id
+    db.session.remove()
+
+    for name, dropped in ADDED_COLUMNS.items():
+        downgrade(db.metadata.tables[name], dropped)
+    with db.engine.begin() as connection:
+        connection.exec_driver_sql('DROP TABLE trade_summary')
+
+    changed = upgrade_schema(db, progress=None)
+
+    assert {'trade', 'ticker', 'trade_summary'} <= set(changed)
+    inspector = sa.inspect(db.engine)
+    for name, added in ADDED_COLUMNS.items():
+        assert set(added) <= {column['name'] for column in inspector.get_columns(name)}
+    assert {index.name for index in db.metadata.tables['trade'].indexes} <= \
+        {index['name'] for index in inspector.get_indexes('trade')}
+
+    trade = db.session.get(Trade, trade_id)
+    assert (trade.risk_per_unit, trade.reward_per_unit, trade.risk_reward_ratio) == (10.0, 30.0, 3.0)
+    assert trade.revision == 1
+    assert trade.ticker.is_active and trade.ticker.synced_at is not None
+
+    # Nothing left to do the second time
+    assert upgrade_schema(db, progress=None) == []
@@ -0,0 +1,54 @@
+"""The process-wide user cache holds no secrets, and admin rights are checked against the user row"""
+import pytest
+from flask import g
+from app import db
+from app.models import User
+from app.utils.auth import create_tokens, user_cache, CACHED_USER_FIELDS
+
+
+def make_user(email, is_admin=False):
+    user = User(name=email.split('@')[0], email=email, phone_number=None, is_admin=is_admin)
+    user.set_password('password')
+    db.session.add(user)
+    db.session.commit()
+    return user.id, {'Authorization': f'Bearer {create_tokens(user)[0]}'}
+
+
+@pytest.fixture(autouse=True)
+def empty_cache():
+    user_cache.clear()
+    yield
+    user_cache.clear()
+
+
+def test_cache_keeps_identity_fields_only(client):
+    user_id, headers = make_user('cached@example.com')
+
+    first = client.get(f'/api/users/{user_id}', headers=headers)
+    cached = user_cache.get(user_id)
+    assert set(cached) == set(CACHED_USER_FIELDS)
+    assert 'password_hash' not in cached
+
+    # Served from the cache, the remaining columns are loaded on demand
+    db.session.remove()
+    second = client.get(f'/api/users/{user_id}', headers=headers)
+    assert first.status_code == second.status_code == 200
+    assert second.json == first.json
+
+
+def test_revoked_admin_loses_access_before_the_token_expires(client):
+    admin_id, admin_headers = make_user('admin@example.com', is_admin=True)
+    first_id, _ = make_user('first@example.com')
+    second_id, _ = make_user('second@example.com')
+
+    assert client.delete(f'/api/users/{first_id}', headers=admin_headers).status_code == 200
+
+    db.session.get(User, admin_id).is_admin = False
+    db.session.commit()
+    db.session.remove()
+    # Requests share the fixture's app context, and with it g
+    g.pop('current_user', None)
+
+    # The token still carries is_admin=True
+    assert client.delete(f'/api/users/{second_id}', headers=admin_headers).status_code == 403
+    assert client.get(f'/api/users/{second_id}', headers=admin_headers).status_code == 403
@@ -0,0 +1,17 @@
+# Brings a database created by an older version up to the current models; back it up first.
+# Tables are altered or rebuilt with their rows, then new tables are filled and search indexes rebuilt.
+from app import create_engine_app, db
+from app.models import Ticker, Tag, TradeSummary
+from app.utils.database import upgrade_schema
+
+app = create_engine_app()
+
+with app.app_context():
+    changed = upgrade_schema(db)
+    if 'trade_summary' in changed:
+        TradeSummary.rebuild()
+        db.session.commit()
+    # Rebuilt SQLite tables lose their full-text triggers, and ticker documents gained is_active
+    for model in (Ticker, Tag):
+        if model.__tablename__ in changed:
+            model.reindex()